@@ -1,39 +1,471 @@
-import ebooklib
-from ebooklib import epub
-from bs4 import BeautifulSoup
+from lxml import etree
+import lxml.html
 import os
+import posixpath
 import tempfile
 import zipfile
+from contextlib import nullcontext
+from urllib.parse import unquote
 from PIL import Image
 import io
+import zlib
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import multiprocessing
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
 from paddleocr import PaddleOCR
+import paddle
+import numpy as np
 import logging
 
+# Optional libjpeg-turbo binding used for fast JPEG decoding
+try:
+    from turbojpeg import TurboJPEG, TJPF_RGB
+except ImportError:
+    TurboJPEG = None
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Failures expected from Paddle inference (its C++ errors surface as these
+# builtins), from reading damaged archive members, and from decoding
+# malformed images; anything else is a bug and propagates
+OCR_ERRORS = (RuntimeError, ValueError, MemoryError)
+ZIP_READ_ERRORS = (KeyError, OSError, zipfile.BadZipFile, zlib.error)
+IMAGE_DECODE_ERRORS = (OSError, ValueError, SyntaxError, MemoryError, Image.DecompressionBombError)
+
+
+def _load_turbojpeg():
+    """Create a TurboJPEG decoder if PyTurboJPEG and libturbojpeg are installed"""
+    if TurboJPEG is None:
+        return None
+    try:
+        return TurboJPEG()
+    except (OSError, RuntimeError) as e:
+        logger.info(f"libturbojpeg unavailable, decoding JPEGs with Pillow: {e}")
+        return None
+
+
+_turbojpeg = _load_turbojpeg()
+
+# Inference backends selectable through the PADDLEOCR_BACKEND env var
+OCR_BACKENDS = ('auto', 'paddle', 'mkldnn', 'onnxruntime', 'tensorrt')
+
+# Devices selectable through the EPUB_OCR_DEVICE env var, and the
+# recognizer batch size used on each. CPU gains nothing from batching
+# text lines while every extra slot grows Paddle's memory arena.
+OCR_DEVICES = ('auto', 'cpu', 'gpu')
+CPU_REC_BATCH_NUM = 1
+GPU_REC_BATCH_NUM = 32
+
+# EPUB container layout (OCF) and the manifest media types holding chapter text
+CONTAINER_PATH = 'META-INF/container.xml'
+EPUB_NAMESPACES = {
+    'container': 'urn:oasis:names:tc:opendocument:xmlns:container',
+    'opf': 'http://www.idpf.org/2007/opf',
+}
+DOCUMENT_MEDIA_TYPES = ('application/xhtml+xml', 'text/html')
+
+# Let cuDNN benchmark every convolution algorithm per input shape and
+# give it enough workspace (in MB) to pick the fast ones
+GPU_CONV_FLAGS = {
+    'FLAGS_cudnn_exhaustive_search': True,
+    'FLAGS_conv_workspace_size_limit': 4000,
+}
+
+# Input shapes the OCR model is warmed up with; with TensorRT these
+# seed the dynamic-shape profiles Paddle records next to the models
+OCR_WARMUP_SHAPES = ((32, 32), (640, 640), (960, 960))
+REC_WARMUP_SHAPE = (48, 320)
+
+# Image pipeline tuning: decode threads, bounded queue depth, and the
+# OCR mini-batch that fires on size or after a short wait
+DECODE_WORKERS = min(4, os.cpu_count() or 1)
+# lxml releases the GIL while parsing, so chapter parsing runs on threads
+PARSE_WORKERS = min(4, os.cpu_count() or 1)
+PIPELINE_QUEUE_SIZE = 16
+OCR_BATCH_SIZE = 8
+OCR_BATCH_TIMEOUT = 0.05
+
+# Images whose sampled pixel standard deviation falls below this are
+# treated as blank (solid fills, separators) and skipped before OCR
+BLANK_STD_THRESHOLD = 5.0
+BLANK_SAMPLE_STRIDE = 2
+
+# Images whose longer side exceeds the threshold are OCR'd in overlapping
+# tiles at the detector's native 960px resolution instead of being
+# downscaled; detections repeated in the overlap are merged by IoU
+TILE_THRESHOLD = 1920
+TILE_SIZE = 960
+TILE_OVERLAP = 96
+TILE_IOU_THRESHOLD = 0.5
+# Merged detections whose tops differ by at most this many pixels are read
+# as one line, like PaddleOCR's own box sorting
+TILE_ROW_TOLERANCE = 10
+
+# Images larger than this (uncompressed) are hashed and decoded straight
+# from the archive stream instead of being read into memory first
+STREAM_IMAGE_SIZE = 4 * 1024 * 1024
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+# Number of OCR results kept across requests, keyed by image content hash
+OCR_CACHE_SIZE = 4096
+
+# Worker processes with their own PaddleOCR instance; 0 runs OCR on a
+# thread pool sharing the in-process instance
+OCR_PROCESSES = int(os.environ.get('EPUB_OCR_PROCESSES', '0'))
+# Seconds a warmed-up worker waits for the rest of the pool to start
+OCR_WORKER_START_TIMEOUT = 600
+
+# PaddleOCR instance owned by an OCR pool worker process, and the barrier
+# that holds it at warmup until every worker has started
+_worker_ocr = None
+_worker_barrier = None
+
+
+def _gpu_available() -> bool:
+    """Check whether Paddle was built with CUDA and can see a device"""
+    return paddle.is_compiled_with_cuda() and paddle.device.cuda.device_count() > 0
+
+
+def _ocr_options() -> dict:
+    """Build PaddleOCR keyword arguments for the configured inference backend"""
+    backend = os.environ.get('PADDLEOCR_BACKEND', 'auto').lower()
+    if backend not in OCR_BACKENDS:
+        raise ValueError(f"Unsupported PADDLEOCR_BACKEND '{backend}', expected one of {OCR_BACKENDS}")
+    
+    device = os.environ.get('EPUB_OCR_DEVICE', 'auto').lower()
+    if device not in OCR_DEVICES:
+        raise ValueError(f"Unsupported EPUB_OCR_DEVICE '{device}', expected one of {OCR_DEVICES}")
+    
+    if backend == 'tensorrt' and device == 'cpu':
+        raise ValueError("PADDLEOCR_BACKEND 'tensorrt' needs a GPU, but EPUB_OCR_DEVICE is 'cpu'")
+    
+    use_gpu = _gpu_available() if device == 'auto' else device == 'gpu'
+    if backend == 'auto':
+        # TensorRT with FP16 on GPU hosts, oneDNN (MKLDNN) kernels on CPU
+        backend = 'tensorrt' if use_gpu else 'mkldnn'
+    
+    options = {
+        'use_angle_cls': True,
+        'lang': 'en',
+        'use_gpu': use_gpu,
+        'cpu_threads': os.cpu_count(),
+    }
+    
+    if backend == 'tensorrt':
+        options.update(use_gpu=True, use_tensorrt=True, precision='fp16')
+    
+    if options['use_gpu']:
+        options.update(rec_batch_num=GPU_REC_BATCH_NUM)
+    else:
+        options.update(rec_batch_num=CPU_REC_BATCH_NUM, cls_batch_num=CPU_REC_BATCH_NUM)
+    
+    if backend == 'mkldnn':
+        options.update(enable_mkldnn=True)
+    elif backend == 'onnxruntime':
+        # ONNX Runtime needs exported models, PaddleOCR does not download them
+        onnx_dir = os.environ.get('PADDLEOCR_ONNX_DIR', '')
+        options.update(
+            use_onnx=True,
+            det_model_dir=os.path.join(onnx_dir, 'det.onnx'),
+            rec_model_dir=os.path.join(onnx_dir, 'rec.onnx'),
+            cls_model_dir=os.path.join(onnx_dir, 'cls.onnx'),
+        )
+    
+    # Keep models (and the TensorRT shape files collected on first run)
+    # in a persistent location so restarts reuse them
+    model_dir = os.environ.get('PADDLEOCR_MODEL_DIR')
+    if model_dir and backend != 'onnxruntime':
+        options.update(
+            det_model_dir=os.path.join(model_dir, 'det'),
+            rec_model_dir=os.path.join(model_dir, 'rec'),
+            cls_model_dir=os.path.join(model_dir, 'cls'),
+        )
+    
+    return options
+
+
+def _configure_gpu(options: dict):
+    """Enable cuDNN convolution autotuning before a GPU predictor is built"""
+    if not options.get('use_gpu'):
+        return
+    try:
+        paddle.set_flags(GPU_CONV_FLAGS)
+    except ValueError as e:
+        logger.warning(f"Could not enable cuDNN autotuning: {e}")
+
+
+def _html_to_text(content: bytes) -> str:
+    """Extract visible text from an (X)HTML document using lxml's C parser"""
+    try:
+        root = lxml.html.document_fromstring(content)
+    except etree.ParserError:
+        # Empty document
+        return ""
+    
+    etree.strip_elements(root, 'script', 'style', with_tail=False)
+    return " ".join(text.strip() for text in root.itertext() if text.strip())
+
+
+def _parse_xml(content: bytes):
+    """Parse EPUB metadata XML without resolving entities or fetching DTDs"""
+    parser = etree.XMLParser(resolve_entities=False, no_network=True)
+    return etree.fromstring(content, parser)
+
+
+def _read_manifest(zip_file) -> tuple:
+    """List the EPUB's XHTML document paths in manifest order and count its images"""
+    container = _parse_xml(zip_file.read(CONTAINER_PATH))
+    rootfile = container.find('.//container:rootfile', EPUB_NAMESPACES)
+    if rootfile is None:
+        raise ValueError("EPUB container.xml does not reference a package document")
+    
+    opf_path = rootfile.get('full-path')
+    package = _parse_xml(zip_file.read(opf_path))
+    opf_dir = posixpath.dirname(opf_path)
+    
+    documents = []
+    image_count = 0
+    for item in package.iterfind('opf:manifest/opf:item', EPUB_NAMESPACES):
+        media_type = item.get('media-type') or ''
+        if media_type.startswith('image/'):
+            image_count += 1
+            continue
+        if media_type not in DOCUMENT_MEDIA_TYPES:
+            continue
+        # The EPUB 3 navigation document is a table of contents, not content
+        if 'nav' in (item.get('properties') or '').split():
+            continue
+        href = unquote(item.get('href', ''))
+        documents.append(posixpath.normpath(posixpath.join(opf_dir, href)))
+    
+    return documents, image_count
+
+
+def _is_blank(image: np.ndarray) -> bool:
+    """Cheaply detect near-uniform images that cannot contain text"""
+    sample = image[::BLANK_SAMPLE_STRIDE, ::BLANK_SAMPLE_STRIDE]
+    if sample.size == 0:
+        return True
+    
+    # Per-channel spread, so a solid colour fill also counts as blank
+    spread = sample.reshape(-1, sample.shape[-1]).std(axis=0, dtype=np.float32)
+    return float(spread.max()) < BLANK_STD_THRESHOLD
+
+
+def _shape_bucket(shape: tuple) -> tuple:
+    """Round an image shape up to the 32px grid the detector resizes to"""
+    height, width = shape[:2]
+    return (-(-height // 32), -(-width // 32))
+
+
+def _warmup_ocr(ocr):
+    """Run OCR on blank images so the first request skips engine setup"""
+    try:
+        for height, width in OCR_WARMUP_SHAPES:
+            ocr.ocr(np.zeros((height, width, 3), dtype=np.uint8), cls=True)
+        
+        # Blank pages produce no text boxes, so exercise the
+        # classifier and recognizer directly with a text-line crop
+        height, width = REC_WARMUP_SHAPE
+        ocr.ocr(np.zeros((height, width, 3), dtype=np.uint8), det=False, cls=True)
+    except OCR_ERRORS as e:
+        logger.warning(f"OCR warmup failed: {e}")
+
+
+def _tile_origins(length: int) -> list:
+    """Start offsets of overlapping tiles covering one image axis"""
+    if length <= TILE_SIZE:
+        return [0]
+    origins = list(range(0, length - TILE_SIZE, TILE_SIZE - TILE_OVERLAP))
+    origins.append(length - TILE_SIZE)
+    return origins
+
+
+def _box_iou(a: tuple, b: tuple) -> float:
+    """Intersection over union of two (left, top, right, bottom) rectangles"""
+    width = min(a[2], b[2]) - max(a[0], b[0])
+    height = min(a[3], b[3]) - max(a[1], b[1])
+    if width <= 0 or height <= 0:
+        return 0.0
+    
+    intersection = width * height
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - intersection
+    return intersection / union
+
+
+def _recognize_tiled(ocr, image: np.ndarray) -> str:
+    """Run OCR on a large image tile by tile, merging repeated detections"""
+    height, width = image.shape[:2]
+    detections = []
+    for top in _tile_origins(height):
+        for left in _tile_origins(width):
+            result = ocr.ocr(image[top:top + TILE_SIZE, left:left + TILE_SIZE], cls=True)
+            if not result or not result[0]:
+                continue
+            
+            for box, (text, confidence) in result[0]:
+                xs = [x for x, _ in box]
+                ys = [y for _, y in box]
+                rect = (min(xs) + left, min(ys) + top, max(xs) + left, max(ys) + top)
+                detections.append((rect, text, confidence))
+    
+    # A line inside an overlap is read by two tiles; keep the more confident one
+    kept = []
+    for detection in sorted(detections, key=lambda d: d[2], reverse=True):
+        if all(_box_iou(detection[0], other[0]) < TILE_IOU_THRESHOLD for other in kept):
+            kept.append(detection)
+    
+    # Back to reading order: rows top to bottom, each row left to right
+    rows = []
+    for detection in sorted(kept, key=lambda d: d[0][1]):
+        if rows and detection[0][1] - rows[-1][0][0][1] <= TILE_ROW_TOLERANCE:
+            rows[-1].append(detection)
+        else:
+            rows.append([detection])
+    return " ".join(text for row in rows for _, text, _ in sorted(row, key=lambda d: d[0][0]))
+
+
+def _recognize_text(ocr, image) -> Optional[str]:
+    """Run OCR on image, returning None if inference failed"""
+    try:
+        # View the PIL Image as a numpy array for PaddleOCR; decoded
+        # arrays pass through without another pixel copy
+        img_array = np.asarray(image)
+        
+        if max(img_array.shape[:2]) > TILE_THRESHOLD:
+            return _recognize_tiled(ocr, img_array)
+        
+        result = ocr.ocr(img_array, cls=True)
+        
+        if not result or not result[0]:
+            return ""
+        
+        # Each detected line is (box, (text, confidence))
+        return " ".join(line[1][0] for line in result[0])
+    
+    except OCR_ERRORS as e:
+        logger.warning(f"OCR processing failed: {e}")
+        return None
+
+
+def _recognize_batch(ocr, images: list) -> list:
+    """Run OCR on a batch of images, returning texts (None where inference failed) in input order"""
+    texts = [""] * len(images)
+    
+    # Feed same-sized inputs back to back so Paddle can reuse its tensors
+    order = sorted(range(len(images)), key=lambda i: _shape_bucket(images[i].shape))
+    for i in order:
+        texts[i] = _recognize_text(ocr, images[i])
+    
+    return texts
+
+
+def _init_ocr_worker(options: dict, barrier=None):
+    """Build the PaddleOCR instance for an OCR pool worker process"""
+    global _worker_ocr, _worker_barrier
+    _configure_gpu(options)
+    _worker_ocr = PaddleOCR(**options)
+    _worker_barrier = barrier
+
+
+def _warmup_ocr_worker(_) -> int:
+    """Warm up an OCR pool worker, then wait for the others and return its PID"""
+    try:
+        _warmup_ocr(_worker_ocr)
+    finally:
+        # A worker blocked here cannot take another warmup task, so the pool
+        # has to start one process per task
+        if _worker_barrier is not None:
+            _worker_barrier.wait()
+    return os.getpid()
+
+
+def _ocr_worker_batch(items: list) -> list:
+    """Decode and OCR (file name, bytes) pairs inside an OCR pool worker"""
+    texts = [""] * len(items)
+    decoded = []
+    for i, (image_file, image_data) in enumerate(items):
+        image = EPUBProcessor._decode_image(image_file, image_data)
+        if image is not None:
+            decoded.append((i, image))
+    
+    results = _recognize_batch(_worker_ocr, [image for _, image in decoded])
+    for (i, _), text in zip(decoded, results):
+        texts[i] = text
+    
+    return texts
+
+
 class EPUBProcessor:
+    # Chapter parsing pool shared by all instances, created on first use
+    _parse_pool = None
+    
     def __init__(self):
-        self.ocr = PaddleOCR(use_angle_cls=True, lang='en')
-        self.executor = ThreadPoolExecutor(max_workers=4)
+        options = _ocr_options()
+        _configure_gpu(options)
+        self.ocr_processes = OCR_PROCESSES
+        if self.ocr_processes:
+            # Concurrent calls into one Paddle predictor serialize, so each
+            # worker process gets its own; spawn keeps CUDA state out of forks
+            self.ocr = None
+            mp_context = multiprocessing.get_context('spawn')
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.ocr_processes,
+                mp_context=mp_context,
+                initializer=_init_ocr_worker,
+                initargs=(options, mp_context.Barrier(self.ocr_processes, timeout=OCR_WORKER_START_TIMEOUT)),
+            )
+        else:
+            self.ocr = PaddleOCR(**options)
+            self.executor = ThreadPoolExecutor(max_workers=4)
+        # OCR batches kept in flight per EPUB: one per executor worker
+        self.ocr_workers = self.executor._max_workers
+        self.decode_executor = ThreadPoolExecutor(max_workers=DECODE_WORKERS)
+        self.ocr_cache = OrderedDict()
     
-    async def extract_text(self, epub_path: str) -> str:
-        """Extract text from EPUB file with OCR support for images"""
+    def warmup(self):
+        """Run OCR on blank images so the first request skips engine setup"""
+        self._get_parse_pool()
+        if self.ocr_processes:
+            try:
+                pids = set(self.executor.map(_warmup_ocr_worker, range(self.ocr_processes)))
+            except threading.BrokenBarrierError:
+                raise RuntimeError("OCR worker processes did not all start") from None
+            except OCR_ERRORS as e:
+                logger.warning(f"OCR worker warmup failed: {e}")
+            else:
+                logger.info(f"Started {len(pids)} OCR worker processes")
+        else:
+            _warmup_ocr(self.ocr)
+    
+    async def extract_text(self, epub_path: str, failed_images: list = None) -> str:
+        """Extract text from EPUB file with OCR support, adding images whose OCR failed to failed_images"""
         try:
-            book = epub.read_epub(epub_path)
-            all_text = []
-            
-            # Process text-based content
-            text_content = await self._extract_text_content(book)
-            if text_content:
-                all_text.append(text_content)
-            
-            # Process image-based content with OCR
-            image_text = await self._extract_image_text(epub_path)
-            if image_text:
-                all_text.append(image_text)
+            loop = asyncio.get_running_loop()
+            # Opening the archive and parsing its manifest block, so both run
+            # off the event loop; one archive handle then serves both the
+            # chapter and the image pass
+            zip_file = await loop.run_in_executor(None, zipfile.ZipFile, epub_path)
+            with zip_file:
+                all_text = []
+                documents, image_count = await loop.run_in_executor(None, _read_manifest, zip_file)
+                
+                # Process text-based content
+                text_content = await self._extract_text_content(zip_file, documents)
+                if text_content:
+                    all_text.append(text_content)
+                
+                # Process image-based content with OCR; text-only books
+                # skip the image pipeline entirely
+                if image_count:
+                    image_text = await self._extract_image_text(zip_file, failed_images)
+                    if image_text:
+                        all_text.append(image_text)
             
             return "\n\n".join(all_text)
         
@@ -41,94 +473,300 @@ class EPUBProcessor:
             logger.error(f"Error extracting text from EPUB: {e}")
             raise
     
-    async def _extract_text_content(self, book) -> str:
+    @classmethod
+    def _get_parse_pool(cls) -> ThreadPoolExecutor:
+        """Return the thread pool that parses chapter HTML in parallel"""
+        if cls._parse_pool is None:
+            # Threads, not processes: lxml parses without holding the GIL, and
+            # spawned workers would each re-import Paddle before their first task
+            cls._parse_pool = ThreadPoolExecutor(max_workers=PARSE_WORKERS)
+        return cls._parse_pool
+    
+    async def _extract_text_content(self, zip_file, documents: list = None) -> str:
         """Extract text from HTML content in EPUB"""
-        text_parts = []
+        if documents is None:
+            documents, _ = _read_manifest(zip_file)
         
-        for item in book.get_items():
-            if item.get_type() == ebooklib.ITEM_DOCUMENT:
-                soup = BeautifulSoup(item.get_content(), 'html.parser')
-                text = soup.get_text(separator=' ', strip=True)
-                if text:
-                    text_parts.append(text)
+        def read_document(document):
+            try:
+                content = zip_file.read(document)
+            except KeyError:
+                logger.warning(f"Document {document} listed in manifest is missing from EPUB")
+                return ""
+            return _html_to_text(content)
         
-        return "\n\n".join(text_parts)
+        # Chapters are read, inflated and parsed in parallel, off the event loop
+        loop = asyncio.get_running_loop()
+        parse_pool = self._get_parse_pool()
+        text_parts = await asyncio.gather(*(
+            loop.run_in_executor(parse_pool, read_document, document) for document in documents
+        ))
+        return "\n\n".join(text for text in text_parts if text)
     
-    async def _extract_image_text(self, epub_path: str) -> str:
-        """Extract text from images in EPUB using OCR"""
+    async def _extract_image_text(self, epub, failed_images: list = None) -> str:
+        """Extract text from images in an EPUB path or open ZipFile using OCR"""
         image_texts = []
         
         try:
-            with zipfile.ZipFile(epub_path, 'r') as zip_file:
+            if isinstance(epub, zipfile.ZipFile):
+                archive = nullcontext(epub)
+            else:
+                archive = zipfile.ZipFile(epub, 'r')
+            
+            with archive as zip_file:
                 image_files = [f for f in zip_file.namelist() 
                              if f.lower().endswith(('.png', '.jpg', '.jpeg', '.gif', '.bmp'))]
                 
                 if not image_files:
                     return ""
                 
-                # Process images in parallel
-                tasks = []
-                for image_file in image_files:
-                    task = self._process_image_from_zip(zip_file, image_file)
-                    tasks.append(task)
-                
-                results = await asyncio.gather(*tasks, return_exceptions=True)
-                
-                for result in results:
-                    if isinstance(result, str) and result:
-                        image_texts.append(result)
-                    elif isinstance(result, Exception):
-                        logger.warning(f"Error processing image: {result}")
+                results = await self._run_image_pipeline(zip_file, image_files)
+                image_texts = [text for text in results if text]
+                if failed_images is not None:
+                    failed_images.extend(
+                        image_file for image_file, text in zip(image_files, results) if text is None
+                    )
         
-        except Exception as e:
+        except (zipfile.BadZipFile, KeyError) as e:
             logger.error(f"Error extracting images from EPUB: {e}")
         
         return "\n\n".join(image_texts)
     
-    async def _process_image_from_zip(self, zip_file, image_file: str) -> str:
-        """Process a single image file with OCR"""
+    async def _run_image_pipeline(self, zip_file, image_files: list) -> list:
+        """Read, decode and OCR images in overlapping stages, returning texts in input order"""
+        loop = asyncio.get_running_loop()
+        decode_queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        ocr_queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        texts = [""] * len(image_files)
+        # Content hash -> index of its first occurrence, and repeats of it
+        first_seen = {}
+        duplicates = []
+        
+        async def read_images():
+            for index, image_file in enumerate(image_files):
+                # Inflating and hashing block, so they run on the decode threads
+                image_data, digest = await loop.run_in_executor(
+                    self.decode_executor, self._read_and_hash, zip_file, image_file
+                )
+                if digest is None:
+                    continue
+                
+                # Repeated ornaments and logos are only OCR'd once
+                if digest in first_seen:
+                    duplicates.append((index, first_seen[digest]))
+                    continue
+                first_seen[digest] = index
+                
+                if digest in self.ocr_cache:
+                    self.ocr_cache.move_to_end(digest)
+                    texts[index] = self.ocr_cache[digest]
+                    continue
+                
+                await decode_queue.put((index, image_file, image_data))
+            for _ in range(DECODE_WORKERS):
+                await decode_queue.put(None)
+        
+        async def decode_images():
+            while True:
+                item = await decode_queue.get()
+                if item is None:
+                    return
+                index, image_file, image_data = item
+                if self.ocr_processes:
+                    # Pool workers decode locally, so only the compressed
+                    # bytes cross the process boundary
+                    await ocr_queue.put((index, (image_file, image_data)))
+                    continue
+                if image_data is None:
+                    image = await loop.run_in_executor(
+                        self.decode_executor, self._decode_zip_entry, zip_file, image_file
+                    )
+                else:
+                    image = await loop.run_in_executor(
+                        self.decode_executor, self._decode_image, image_file, image_data
+                    )
+                if image is not None:
+                    await ocr_queue.put((index, image))
+        
+        async def recognize_batch(batch):
+            indices = [index for index, _ in batch]
+            images = [image for _, image in batch]
+            if self.ocr_processes:
+                results = await loop.run_in_executor(self.executor, _ocr_worker_batch, images)
+            else:
+                results = await loop.run_in_executor(self.executor, self._run_ocr_batch, images)
+            for index, text in zip(indices, results):
+                texts[index] = text
+        
+        async def recognize_images():
+            # Batches run concurrently, up to one per executor worker
+            in_flight = set()
+            finished = False
+            try:
+                while not finished:
+                    # Block for the first item, then top the batch up until it
+                    # is full or the batch window expires
+                    batch = [await ocr_queue.get()]
+                    deadline = loop.time() + OCR_BATCH_TIMEOUT
+                    while batch[-1] is not None and len(batch) < OCR_BATCH_SIZE:
+                        try:
+                            batch.append(await asyncio.wait_for(ocr_queue.get(), deadline - loop.time()))
+                        except asyncio.TimeoutError:
+                            break
+                    
+                    if batch[-1] is None:
+                        finished = True
+                        batch.pop()
+                    if not batch:
+                        continue
+                    
+                    if len(in_flight) >= self.ocr_workers:
+                        done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                        errors = [task.exception() for task in done]
+                        for error in errors:
+                            if error is not None:
+                                raise error
+                    in_flight.add(asyncio.ensure_future(recognize_batch(batch)))
+                
+                if in_flight:
+                    await asyncio.gather(*in_flight)
+            finally:
+                for task in in_flight:
+                    task.cancel()
+                # Collect every batch so a second failure is not reported as
+                # an unretrieved task exception
+                await asyncio.gather(*in_flight, return_exceptions=True)
+        
+        async def close_decoding(decoders):
+            await asyncio.gather(*decoders)
+            await ocr_queue.put(None)
+        
+        decoders = [asyncio.ensure_future(decode_images()) for _ in range(DECODE_WORKERS)]
+        stages = [
+            asyncio.ensure_future(read_images()),
+            asyncio.ensure_future(close_decoding(decoders)),
+            asyncio.ensure_future(recognize_images()),
+        ] + decoders
         try:
-            image_data = zip_file.read(image_file)
-            image = Image.open(io.BytesIO(image_data))
-            
-            # Convert to RGB if necessary
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
-            
-            # Run OCR in thread pool to avoid blocking
-            loop = asyncio.get_event_loop()
-            ocr_result = await loop.run_in_executor(
-                self.executor, 
-                self._run_ocr, 
-                image
-            )
-            
-            return ocr_result
+            # A failed stage leaves its neighbours blocked on the bounded
+            # queues, so stop at the first error instead of waiting on them
+            done, _ = await asyncio.wait(stages, return_when=asyncio.FIRST_EXCEPTION)
+            errors = [task.exception() for task in done]
+            for error in errors:
+                if error is not None:
+                    raise error
+        finally:
+            for task in stages:
+                task.cancel()
         
-        except Exception as e:
-            logger.warning(f"Error processing image {image_file}: {e}")
-            return ""
+        # Failed recognitions come back as None and are retried next time
+        # rather than cached as blank
+        for digest, index in first_seen.items():
+            if texts[index] is not None:
+                self._cache_ocr_text(digest, texts[index])
+        for index, first_index in duplicates:
+            texts[index] = texts[first_index]
+        
+        return texts
+    
+    def _cache_ocr_text(self, digest: bytes, text: str):
+        """Remember the OCR text for an image hash, evicting the least recently used"""
+        self.ocr_cache[digest] = text
+        self.ocr_cache.move_to_end(digest)
+        if len(self.ocr_cache) > OCR_CACHE_SIZE:
+            self.ocr_cache.popitem(last=False)
     
-    def _run_ocr(self, image: Image.Image) -> str:
-        """Run OCR on image"""
+    def _read_image_from_zip(self, zip_file, image_file: str):
+        """Read the raw bytes of a single image file from the EPUB"""
         try:
-            # Convert PIL Image to numpy array for PaddleOCR
-            import numpy as np
-            img_array = np.array(image)
-            
-            result = self.ocr.ocr(img_array, cls=True)
+            return zip_file.read(image_file)
+        except ZIP_READ_ERRORS as e:
+            logger.warning(f"Error reading image {image_file}: {e}")
+            return None
+    
+    def _read_and_hash(self, zip_file, image_file: str) -> tuple:
+        """Return an image's bytes (None when it will be streamed) and content hash"""
+        if self._should_stream(zip_file, image_file):
+            return None, self._hash_zip_entry(zip_file, image_file)
+        image_data = self._read_image_from_zip(zip_file, image_file)
+        if image_data is None:
+            return None, None
+        return image_data, hashlib.blake2b(image_data, digest_size=16).digest()
+    
+    def _should_stream(self, zip_file, image_file: str) -> bool:
+        """Check whether an image is large enough to decode from the archive stream"""
+        if self.ocr_processes:
+            # Pool workers decode from bytes sent across the process boundary
+            return False
+        try:
+            return zip_file.getinfo(image_file).file_size > STREAM_IMAGE_SIZE
+        except KeyError:
+            return False
+    
+    def _hash_zip_entry(self, zip_file, image_file: str):
+        """Hash an image's content in chunks without holding all of it in memory"""
+        try:
+            hasher = hashlib.blake2b(digest_size=16)
+            with zip_file.open(image_file) as image_stream:
+                for chunk in iter(lambda: image_stream.read(STREAM_CHUNK_SIZE), b''):
+                    hasher.update(chunk)
+            return hasher.digest()
+        except ZIP_READ_ERRORS as e:
+            logger.warning(f"Error reading image {image_file}: {e}")
+            return None
+    
+    def _decode_zip_entry(self, zip_file, image_file: str):
+        """Decode an image directly from its archive stream into an RGB array"""
+        try:
+            with zip_file.open(image_file) as image_stream:
+                # Pixels are fully decoded before the stream closes
+                return self._decode_image(image_file, image_stream)
+        except ZIP_READ_ERRORS as e:
+            logger.warning(f"Error reading image {image_file}: {e}")
+            return None
+    
+    @staticmethod
+    def _decode_image(image_file: str, image_data):
+        """Decode image bytes or a binary stream into an RGB array"""
+        try:
+            image_array = None
+            is_bytes = isinstance(image_data, bytes)
+            if is_bytes and _turbojpeg is not None and image_file.lower().endswith(('.jpg', '.jpeg')):
+                image_array = EPUBProcessor._decode_jpeg(image_file, image_data)
             
-            if not result or not result[0]:
-                return ""
+            if image_array is None:
+                image = Image.open(io.BytesIO(image_data) if is_bytes else image_data)
+                
+                # Convert to RGB if necessary
+                if image.mode != 'RGB':
+                    image = image.convert('RGB')
+                
+                image_array = np.asarray(image)
             
-            # Extract text from OCR result
-            text_parts = []
-            for line in result[0]:
-                if line and len(line) > 1:
-                    text_parts.append(line[1][0])
+            if _is_blank(image_array):
+                logger.debug(f"Skipping blank image {image_file}")
+                return None
             
-            return " ".join(text_parts)
+            return image_array
         
-        except Exception as e:
-            logger.warning(f"OCR processing failed: {e}")
-            return ""
\ No newline at end of file
+        except IMAGE_DECODE_ERRORS as e:
+            logger.warning(f"Error processing image {image_file}: {e}")
+            return None
+    
+    @staticmethod
+    def _decode_jpeg(image_file: str, image_data: bytes):
+        """Decode a JPEG straight to an RGB array with libjpeg-turbo"""
+        try:
+            return _turbojpeg.decode(image_data, pixel_format=TJPF_RGB)
+        except OSError as e:
+            # CMYK and mislabelled files fall back to PIL
+            logger.debug(f"TurboJPEG could not decode {image_file}: {e}")
+            return None
+    
+    def _run_ocr_batch(self, images: list) -> list:
+        """Run OCR on a batch of images, returning texts in input order"""
+        return _recognize_batch(self.ocr, images)
+    
+    def _run_ocr(self, image: Image.Image) -> Optional[str]:
+        """Run OCR on image, returning None if inference failed"""
+        return _recognize_text(self.ocr, image)
@@ -1,55 +1,315 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, BackgroundTasks, HTTPException, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, StreamingResponse
+from multipart.multipart import MultipartParser, parse_options_header
+from multipart.exceptions import MultipartParseError
+from starlette.concurrency import run_in_threadpool
+from contextlib import asynccontextmanager
 import uvicorn
 import os
+import hashlib
+import json
+import logging
 import tempfile
-import shutil
+import aiofiles.tempfile
 from epub_processor import EPUBProcessor
 
+logger = logging.getLogger(__name__)
+
+MAX_UPLOAD_SIZE = 50 * 1024 * 1024  # 50MB limit
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Room for the multipart boundaries and part headers around the file itself
+UPLOAD_FRAMING_ALLOWANCE = 64 * 1024
+# Characters of extracted text per line of the NDJSON streaming endpoint
+STREAM_TEXT_CHUNK_SIZE = 64 * 1024
+# Every EPUB is a ZIP archive, which starts with a local file header
+EPUB_MAGIC = b'PK\x03\x04'
+
+# Uploads are spooled to tmpfs when it has room for several maximum-size
+# uploads at once, so processing reads them from memory; otherwise (e.g.
+# Docker's default 64MB /dev/shm) they go to the regular temp directory.
+# EPUB_OCR_UPLOAD_DIR overrides both
+SHM_UPLOAD_SLOTS = 4
+
+def _default_upload_dir() -> str:
+    """Pick /dev/shm for uploads if it has enough free space, else the temp directory"""
+    try:
+        shm = os.statvfs('/dev/shm')
+    except OSError:
+        return tempfile.gettempdir()
+    if shm.f_bavail * shm.f_frsize >= SHM_UPLOAD_SLOTS * (MAX_UPLOAD_SIZE + UPLOAD_FRAMING_ALLOWANCE):
+        return '/dev/shm'
+    return tempfile.gettempdir()
+
+UPLOAD_TEMP_DIR = os.environ.get('EPUB_OCR_UPLOAD_DIR') or _default_upload_dir()
+
+# Directory where extracted text is kept per EPUB content hash, so repeat
+# uploads skip processing entirely; unset disables the cache
+RESULT_CACHE_DIR = os.environ.get('EPUB_OCR_CACHE_DIR')
+
+# Spawned OCR workers re-run this script as __mp_main__ under `python main.py`;
+# only the serving process builds the processor and its OCR model
+epub_processor = EPUBProcessor() if __name__ != '__mp_main__' else None
+
+def _load_cached_text(digest: str):
+    """Return the cached extraction result for an EPUB hash, if any"""
+    try:
+        with open(os.path.join(RESULT_CACHE_DIR, f"{digest}.txt"), encoding='utf-8') as cache_file:
+            return cache_file.read()
+    except FileNotFoundError:
+        return None
+    except (OSError, UnicodeDecodeError) as e:
+        # An unreadable or corrupt entry is a miss; the upload is extracted again
+        logger.warning(f"Could not read cached result {digest}: {e}")
+        return None
+
+def _store_cached_text(digest: str, text: str):
+    """Atomically write an extraction result to the cache directory"""
+    os.makedirs(RESULT_CACHE_DIR, exist_ok=True)
+    cache_file = tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=RESULT_CACHE_DIR,
+                                             suffix='.tmp', delete=False)
+    try:
+        with cache_file:
+            cache_file.write(text)
+            cache_file.flush()
+            os.fsync(cache_file.fileno())
+        os.replace(cache_file.name, os.path.join(RESULT_CACHE_DIR, f"{digest}.txt"))
+    except BaseException:
+        os.unlink(cache_file.name)
+        raise
+
+def _decode_filename(value: bytes) -> str:
+    """Decode a multipart filename the way Starlette's form parser does"""
+    try:
+        return value.decode('utf-8')
+    except UnicodeDecodeError:
+        return value.decode('latin-1')
+
+def _missing_file_error() -> RequestValidationError:
+    """Build the same 422 error FastAPI raises for a missing required form field"""
+    return RequestValidationError([
+        {"type": "missing", "loc": ("body", "file"), "msg": "Field required", "input": None}
+    ])
+
+class _MultipartUpload:
+    """Incremental multipart/form-data parser that hands over the "file" field as it arrives"""
+    
+    def __init__(self, boundary: bytes):
+        self.filename = None
+        self._chunks = []
+        self._header_name = b''
+        self._header_value = b''
+        self._disposition = b''
+        self._in_file = False
+        self._parser = MultipartParser(boundary, {
+            'on_part_begin': self._on_part_begin,
+            'on_header_field': self._on_header_field,
+            'on_header_value': self._on_header_value,
+            'on_header_end': self._on_header_end,
+            'on_headers_finished': self._on_headers_finished,
+            'on_part_data': self._on_part_data,
+            'on_part_end': self._on_part_end,
+        })
+    
+    def feed(self, data: bytes) -> list:
+        """Parse the next piece of the request body and return the file bytes it carried"""
+        self._parser.write(data)
+        chunks, self._chunks = self._chunks, []
+        return chunks
+    
+    def finalize(self):
+        """Signal the end of the request body"""
+        self._parser.finalize()
+    
+    def _on_part_begin(self):
+        self._disposition = b''
+    
+    def _on_header_field(self, data: bytes, start: int, end: int):
+        self._header_name += data[start:end]
+    
+    def _on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+    
+    def _on_header_end(self):
+        if self._header_name.lower() == b'content-disposition':
+            self._disposition = self._header_value
+        self._header_name = b''
+        self._header_value = b''
+    
+    def _on_headers_finished(self):
+        _, options = parse_options_header(self._disposition)
+        # Only the first "file" field is the upload; other parts are skipped
+        self._in_file = (self.filename is None and options.get(b'name') == b'file'
+                         and b'filename' in options)
+        if self._in_file:
+            self.filename = _decode_filename(options[b'filename'])
+    
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        if self._in_file:
+            self._chunks.append(data[start:end])
+    
+    def _on_part_end(self):
+        self._in_file = False
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm up the OCR model before serving the first request"""
+    epub_processor.warmup()
+    yield
+
 app = FastAPI(
     title="EPUB to Text API",
     description="Extract text from EPUB files with OCR support for image-based content",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
-epub_processor = EPUBProcessor()
+# The endpoint parses its multipart body itself, so describe it for the docs
+UPLOAD_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                    "required": ["file"]
+                }
+            }
+        }
+    }
+}
 
-@app.post("/upload-epub")
-async def upload_epub(file: UploadFile = File(...)):
-    """
-    Upload an EPUB file and extract its text content.
-    Supports both text-based and image-based EPUBs with OCR.
-    """
-    if not file.filename.lower().endswith('.epub'):
-        raise HTTPException(status_code=400, detail="File must be an EPUB file")
-    
-    if file.size > 50 * 1024 * 1024:  # 50MB limit
+async def _process_upload(request: Request, background_tasks: BackgroundTasks) -> tuple:
+    """Receive the uploaded EPUB from a multipart request and return its filename and extracted text"""
+    # A declared body size already over the limit is rejected before any of
+    # it is read; chunked uploads are caught by the byte counter below
+    content_length = request.headers.get('content-length', '')
+    if content_length.isdigit() and int(content_length) > MAX_UPLOAD_SIZE + UPLOAD_FRAMING_ALLOWANCE:
         raise HTTPException(status_code=413, detail="File too large (max 50MB)")
     
+    content_type, options = parse_options_header(request.headers.get('content-type', ''))
+    if content_type != b'multipart/form-data' or b'boundary' not in options:
+        raise _missing_file_error()
+    upload = _MultipartUpload(options[b'boundary'])
+    
+    temp_path = None
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.epub') as temp_file:
-            shutil.copyfileobj(file.file, temp_file)
+        # Hash while streaming so a cache lookup needs no second read
+        hasher = hashlib.blake2b() if RESULT_CACHE_DIR else None
+        async with aiofiles.tempfile.NamedTemporaryFile(delete=False, suffix='.epub', dir=UPLOAD_TEMP_DIR) as temp_file:
             temp_path = temp_file.name
+            received = 0
+            magic_checked = False
+            pending = bytearray()
+            # The body is parsed as it arrives rather than buffered up front, so
+            # an oversized upload is rejected once the limit is crossed
+            async for data in request.stream():
+                chunks = upload.feed(data)
+                # The filename arrives in the part headers, ahead of the file
+                # itself, so a non-EPUB upload is turned away unread
+                if upload.filename is not None and not upload.filename.lower().endswith('.epub'):
+                    raise HTTPException(status_code=400, detail="File must be an EPUB file")
+                for chunk in chunks:
+                    received += len(chunk)
+                    if received > MAX_UPLOAD_SIZE:
+                        raise HTTPException(status_code=413, detail="File too large (max 50MB)")
+                    pending += chunk
+                # Nothing has been written yet when the first bytes arrive, so
+                # a file that is not a ZIP archive never reaches the disk
+                if not magic_checked and received >= len(EPUB_MAGIC):
+                    if not pending.startswith(EPUB_MAGIC):
+                        raise HTTPException(status_code=400, detail="Not a valid EPUB (bad magic)")
+                    magic_checked = True
+                # Coalesce small network reads into chunk-sized writes
+                if len(pending) >= UPLOAD_CHUNK_SIZE:
+                    if hasher is not None:
+                        hasher.update(pending)
+                    await temp_file.write(bytes(pending))
+                    pending.clear()
+            upload.finalize()
+            if hasher is not None:
+                hasher.update(pending)
+            await temp_file.write(bytes(pending))
         
-        extracted_text = await epub_processor.extract_text(temp_path)
+        if upload.filename is None:
+            raise _missing_file_error()
+        if received == 0:
+            raise HTTPException(status_code=400, detail="Empty file")
+        if not magic_checked:
+            raise HTTPException(status_code=400, detail="Not a valid EPUB (bad magic)")
         
-        os.unlink(temp_path)
+        extracted_text = None
+        if hasher is not None:
+            digest = hasher.hexdigest()
+            extracted_text = await run_in_threadpool(_load_cached_text, digest)
         
-        return JSONResponse(content={
-            "filename": file.filename,
-            "text": extracted_text,
-            "status": "success"
-        })
+        if extracted_text is None:
+            failed_images = []
+            extracted_text = await epub_processor.extract_text(temp_path, failed_images)
+            # A partial result is returned but not cached, so the images
+            # whose OCR failed are retried on the next upload
+            if failed_images:
+                logger.warning(f"Not caching result for {upload.filename}: OCR failed for {len(failed_images)} images")
+            elif hasher is not None:
+                try:
+                    await run_in_threadpool(_store_cached_text, digest, extracted_text)
+                except OSError as e:
+                    logger.warning(f"Could not cache result for {upload.filename}: {e}")
+        
+        # Remove the upload after the response has gone out; error responses
+        # run no background tasks, so those are cleaned up in finally
+        background_tasks.add_task(os.unlink, temp_path)
+        temp_path = None
+        return upload.filename, extracted_text
     
+    except (HTTPException, RequestValidationError):
+        raise
+    except MultipartParseError as e:
+        raise HTTPException(status_code=400, detail=f"Malformed multipart body: {str(e)}")
     except Exception as e:
-        if 'temp_path' in locals():
-            os.unlink(temp_path)
         raise HTTPException(status_code=500, detail=f"Error processing EPUB: {str(e)}")
+    finally:
+        if temp_path is not None and os.path.exists(temp_path):
+            os.unlink(temp_path)
+
+@app.post("/upload-epub", openapi_extra=UPLOAD_REQUEST_BODY)
+async def upload_epub(request: Request, background_tasks: BackgroundTasks):
+    """
+    Upload an EPUB file and extract its text content.
+    Supports both text-based and image-based EPUBs with OCR.
+    """
+    filename, extracted_text = await _process_upload(request, background_tasks)
+    return JSONResponse(content={
+        "filename": filename,
+        "text": extracted_text,
+        "status": "success"
+    })
+
+@app.post("/upload-epub/stream", openapi_extra=UPLOAD_REQUEST_BODY)
+async def upload_epub_stream(request: Request, background_tasks: BackgroundTasks):
+    """
+    Upload an EPUB file and stream its text content back as NDJSON.
+    The first line carries the filename and status, each following line a slice of the text.
+    """
+    filename, extracted_text = await _process_upload(request, background_tasks)
+    
+    def ndjson_lines():
+        yield json.dumps({"filename": filename, "status": "success"}, ensure_ascii=False) + "\n"
+        for start in range(0, len(extracted_text), STREAM_TEXT_CHUNK_SIZE):
+            text = extracted_text[start:start + STREAM_TEXT_CHUNK_SIZE]
+            yield json.dumps({"text": text}, ensure_ascii=False) + "\n"
+    
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
 
 @app.get("/")
 async def root():
     """Health check endpoint"""
     return {"message": "EPUB to Text API is running"}
 
+# Generate the OpenAPI schema once at import, after every route is registered;
+# FastAPI serves the stored copy from then on
+app.openapi()
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,180 @@
+"""Rebuild the prebuilt EPUB fixtures in tests/data.
+
+Run this after changing the fixture archives; the test suite only reads the
+checked-in files:
+
+    python scripts/build_fixtures.py
+"""
+import io
+import zipfile
+from pathlib import Path
+
+from PIL import Image, ImageDraw
+
+DATA_DIR = Path(__file__).resolve().parent.parent / 'tests' / 'data'
+
+# Fixed entry timestamp, so rebuilding unchanged fixtures reproduces the same bytes
+FIXED_DATE_TIME = (2020, 1, 1, 0, 0, 0)
+
+def _writestr(zip_file, name, data):
+    """Add a DEFLATE-compressed entry with the fixed timestamp."""
+    info = zipfile.ZipInfo(name, date_time=FIXED_DATE_TIME)
+    zip_file.writestr(info, data, compress_type=zipfile.ZIP_DEFLATED)
+
+def build_minimal_epub() -> bytes:
+    """Build the simple text-based EPUB archive."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as zip_file:
+        # Add mimetype
+        _writestr(zip_file, 'mimetype', 'application/epub+zip')
+        
+        # Add META-INF/container.xml
+        container_xml = '''<?xml version="1.0" encoding="UTF-8"?>
+<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
+    <rootfiles>
+        <rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/>
+    </rootfiles>
+</container>'''
+        _writestr(zip_file, 'META-INF/container.xml', container_xml)
+        
+        # Add content.opf
+        content_opf = '''<?xml version="1.0" encoding="UTF-8"?>
+<package version="3.0" xmlns="http://www.idpf.org/2007/opf" unique-identifier="bookid">
+    <metadata xmlns:dc="http://purl.org/dc/elements/1.1/">
+        <dc:title>Test Book</dc:title>
+        <dc:creator>Test Author</dc:creator>
+        <dc:identifier id="bookid">test-book-123</dc:identifier>
+        <dc:language>en</dc:language>
+    </metadata>
+    <manifest>
+        <item id="chapter1" href="chapter1.xhtml" media-type="application/xhtml+xml"/>
+        <item id="toc" href="toc.ncx" media-type="application/x-dtbncx+xml"/>
+    </manifest>
+    <spine toc="toc">
+        <itemref idref="chapter1"/>
+    </spine>
+</package>'''
+        _writestr(zip_file, 'OEBPS/content.opf', content_opf)
+        
+        # Add chapter1.xhtml
+        chapter_html = '''<?xml version="1.0" encoding="UTF-8"?>
+<html xmlns="http://www.w3.org/1999/xhtml">
+<head>
+    <title>Chapter 1</title>
+</head>
+<body>
+    <h1>Chapter 1: Introduction</h1>
+    <p>This is a test chapter with some sample text content.</p>
+    <p>This EPUB file is used for testing the text extraction functionality.</p>
+</body>
+</html>'''
+        _writestr(zip_file, 'OEBPS/chapter1.xhtml', chapter_html)
+        
+        # Add toc.ncx
+        toc_ncx = '''<?xml version="1.0" encoding="UTF-8"?>
+<ncx version="2005-1" xmlns="http://www.daisy.org/z3986/2005/ncx/">
+    <head>
+        <meta name="dtb:uid" content="test-book-123"/>
+    </head>
+    <docTitle>
+        <text>Test Book</text>
+    </docTitle>
+    <navMap>
+        <navPoint id="chapter1">
+            <navLabel><text>Chapter 1</text></navLabel>
+            <content src="chapter1.xhtml"/>
+        </navPoint>
+    </navMap>
+</ncx>'''
+        _writestr(zip_file, 'OEBPS/toc.ncx', toc_ncx)
+    
+    return buffer.getvalue()
+
+def build_epub_with_images() -> bytes:
+    """Build the EPUB archive with one text image for OCR."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as zip_file:
+        # Add basic EPUB structure (same as text EPUB)
+        _writestr(zip_file, 'mimetype', 'application/epub+zip')
+        
+        container_xml = '''<?xml version="1.0" encoding="UTF-8"?>
+<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
+    <rootfiles>
+        <rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/>
+    </rootfiles>
+</container>'''
+        _writestr(zip_file, 'META-INF/container.xml', container_xml)
+        
+        content_opf = '''<?xml version="1.0" encoding="UTF-8"?>
+<package version="3.0" xmlns="http://www.idpf.org/2007/opf" unique-identifier="bookid">
+    <metadata xmlns:dc="http://purl.org/dc/elements/1.1/">
+        <dc:title>Test Book with Images</dc:title>
+        <dc:creator>Test Author</dc:creator>
+        <dc:identifier id="bookid">test-book-images-123</dc:identifier>
+        <dc:language>en</dc:language>
+    </metadata>
+    <manifest>
+        <item id="chapter1" href="chapter1.xhtml" media-type="application/xhtml+xml"/>
+        <item id="image1" href="images/test_image.png" media-type="image/png"/>
+        <item id="toc" href="toc.ncx" media-type="application/x-dtbncx+xml"/>
+    </manifest>
+    <spine toc="toc">
+        <itemref idref="chapter1"/>
+    </spine>
+</package>'''
+        _writestr(zip_file, 'OEBPS/content.opf', content_opf)
+        
+        # Create a simple test image
+        image = Image.new('RGB', (200, 100), color='white')
+        ImageDraw.Draw(image).text((10, 40), "Sample OCR text", fill='black')
+        image_buffer = io.BytesIO()
+        image.save(image_buffer, format='PNG')
+        _writestr(zip_file, 'OEBPS/images/test_image.png', image_buffer.getvalue())
+        
+        # Add chapter with image reference
+        chapter_html = '''<?xml version="1.0" encoding="UTF-8"?>
+<html xmlns="http://www.w3.org/1999/xhtml">
+<head>
+    <title>Chapter 1</title>
+</head>
+<body>
+    <h1>Chapter 1: Images</h1>
+    <p>This chapter contains an image that should be processed with OCR.</p>
+    <img src="images/test_image.png" alt="Test image"/>
+</body>
+</html>'''
+        _writestr(zip_file, 'OEBPS/chapter1.xhtml', chapter_html)
+        
+        toc_ncx = '''<?xml version="1.0" encoding="UTF-8"?>
+<ncx version="2005-1" xmlns="http://www.daisy.org/z3986/2005/ncx/">
+    <head>
+        <meta name="dtb:uid" content="test-book-images-123"/>
+    </head>
+    <docTitle>
+        <text>Test Book with Images</text>
+    </docTitle>
+    <navMap>
+        <navPoint id="chapter1">
+            <navLabel><text>Chapter 1</text></navLabel>
+            <content src="chapter1.xhtml"/>
+        </navPoint>
+    </navMap>
+</ncx>'''
+        _writestr(zip_file, 'OEBPS/toc.ncx', toc_ncx)
+    
+    return buffer.getvalue()
+
+FIXTURES = {
+    'minimal.epub': build_minimal_epub,
+    'with_images.epub': build_epub_with_images,
+}
+
+def main():
+    """Write every fixture archive into tests/data."""
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    for name, build in FIXTURES.items():
+        (DATA_DIR / name).write_bytes(build())
+        print(f"Wrote {DATA_DIR / name}")
+
+if __name__ == "__main__":
+    main()
@@ -3,23 +3,23 @@ import asyncio
 import zipfile
 import tempfile
 import os
+import threading
+import time
 from unittest.mock import Mock, patch, AsyncMock, MagicMock
-from PIL import Image
+from PIL import Image, ImageDraw
 import io
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 
-from epub_processor import EPUBProcessor
+from epub_processor import EPUBProcessor, OCR_WARMUP_SHAPES, PARSE_WORKERS
 
 
 class TestEPUBProcessor:
     
     @pytest.fixture
-    def processor(self, mock_paddleocr):
+    def processor(self):
         """Create EPUBProcessor with mocked OCR."""
-        with patch('epub_processor.PaddleOCR') as mock_ocr_class:
-            mock_ocr_class.return_value = mock_paddleocr
-            processor = EPUBProcessor()
-            return processor
+        return EPUBProcessor()
     
     @pytest.mark.asyncio
     async def test_extract_text_from_text_based_epub(self, processor, sample_epub_text):
@@ -47,10 +47,8 @@ class TestEPUBProcessor:
     @pytest.mark.asyncio
     async def test_extract_text_content_only(self, processor, sample_epub_text):
         """Test _extract_text_content method specifically."""
-        from ebooklib import epub
-        
-        book = epub.read_epub(sample_epub_text)
-        result = await processor._extract_text_content(book)
+        with zipfile.ZipFile(sample_epub_text, 'r') as zip_file:
+            result = await processor._extract_text_content(zip_file)
         
         assert "Chapter 1: Introduction" in result
         assert "This is a test chapter" in result
@@ -59,13 +57,86 @@ class TestEPUBProcessor:
     @pytest.mark.asyncio
     async def test_extract_text_content_empty_book(self, processor):
         """Test _extract_text_content with empty book."""
-        mock_book = Mock()
-        mock_book.get_items.return_value = []
-        
-        result = await processor._extract_text_content(mock_book)
+        with patch('epub_processor._read_manifest', return_value=([], 0)):
+            result = await processor._extract_text_content(Mock())
         
         assert result == ""
     
+    @pytest.mark.asyncio
+    async def test_extract_text_content_keeps_chapter_order(self, processor):
+        """Test chapters parsed in parallel are joined in manifest order."""
+        chapters = {f'OEBPS/chapter{i}.xhtml': f'<html><body><p>Chapter {i}</p></body></html>'.encode()
+                    for i in range(5)}
+        reader_threads = set()
+        
+        def read(name):
+            reader_threads.add(threading.get_ident())
+            return chapters[name]
+        
+        zip_file = Mock()
+        zip_file.read.side_effect = read
+        
+        with patch('epub_processor._read_manifest', return_value=(list(chapters), 0)):
+            result = await processor._extract_text_content(zip_file)
+        
+        assert result == "\n\n".join(f"Chapter {i}" for i in range(5))
+        # Chapters are inflated off the event loop thread
+        assert threading.get_ident() not in reader_threads
+        assert EPUBProcessor._get_parse_pool() is EPUBProcessor._get_parse_pool()
+        # Parsing stays on capped threads; no Paddle-importing worker processes
+        assert isinstance(EPUBProcessor._get_parse_pool(), ThreadPoolExecutor)
+        assert EPUBProcessor._get_parse_pool()._max_workers == PARSE_WORKERS
+    
+    def test_read_manifest(self, sample_epub_text):
+        """Test manifest documents are resolved relative to the package document."""
+        from epub_processor import _read_manifest
+        
+        with zipfile.ZipFile(sample_epub_text, 'r') as zip_file:
+            documents, image_count = _read_manifest(zip_file)
+        
+        assert documents == ['OEBPS/chapter1.xhtml']
+        assert image_count == 0
+    
+    @pytest.mark.asyncio
+    async def test_extract_text_skips_image_pipeline_for_text_only_book(self, processor, sample_epub_text):
+        """Test that EPUBs without manifest images never reach the image pipeline."""
+        with patch.object(processor, '_extract_image_text') as mock_image_text:
+            result = await processor.extract_text(sample_epub_text)
+        
+        assert "Chapter 1: Introduction" in result
+        mock_image_text.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_extract_text_reads_manifest_off_event_loop(self, processor, sample_epub_text):
+        """Test that the archive manifest is read on a worker thread, not the event loop."""
+        import threading
+        from epub_processor import _read_manifest
+        
+        manifest_threads = []
+        
+        def read_manifest(zip_file):
+            manifest_threads.append(threading.current_thread())
+            return _read_manifest(zip_file)
+        
+        with patch('epub_processor._read_manifest', side_effect=read_manifest):
+            result = await processor.extract_text(sample_epub_text)
+        
+        assert "Chapter 1: Introduction" in result
+        assert manifest_threads and manifest_threads[0] is not threading.main_thread()
+    
+    def test_html_to_text(self):
+        """Test HTML text extraction skips scripts, styles and empty documents."""
+        from epub_processor import _html_to_text
+        
+        content = b"""<?xml version="1.0" encoding="UTF-8"?>
+<html xmlns="http://www.w3.org/1999/xhtml">
+<head><title>Title</title><style>p { color: red; }</style></head>
+<body><h1>Heading</h1><p>Fish &amp; <b>chips</b></p><script>var x = 1;</script></body>
+</html>"""
+        
+        assert _html_to_text(content) == "Title Heading Fish & chips"
+        assert _html_to_text(b"") == ""
+    
     @pytest.mark.asyncio
     async def test_extract_image_text_with_images(self, processor, sample_epub_with_images):
         """Test _extract_image_text method with actual images."""
@@ -95,54 +166,120 @@ class TestEPUBProcessor:
             finally:
                 os.unlink(temp_file.name)
     
-    @pytest.mark.asyncio
-    async def test_process_image_from_zip_success(self, processor):
-        """Test _process_image_from_zip with valid image."""
+    def test_decode_image_success(self, processor):
+        """Test _decode_image with valid image."""
         # Create a test ZIP file with an image
         with tempfile.NamedTemporaryFile(suffix='.zip', delete=False) as temp_file:
             with zipfile.ZipFile(temp_file.name, 'w') as zip_file:
                 # Create a simple test image
                 image = Image.new('RGB', (100, 50), color='white')
+                ImageDraw.Draw(image).text((10, 20), "Sample", fill='black')
                 image_buffer = io.BytesIO()
                 image.save(image_buffer, format='PNG')
                 zip_file.writestr('test_image.png', image_buffer.getvalue())
             
             try:
                 with zipfile.ZipFile(temp_file.name, 'r') as zip_file:
-                    result = await processor._process_image_from_zip(zip_file, 'test_image.png')
+                    result = processor._decode_image('test_image.png', zip_file.read('test_image.png'))
                     
-                    assert "Sample OCR text" in result
-                    assert isinstance(result, str)
+                    assert isinstance(result, np.ndarray)
+                    assert result.shape == (50, 100, 3)
+                    assert result.dtype == np.uint8
             finally:
                 os.unlink(temp_file.name)
     
+    def test_decode_image_skips_blank_image(self, processor):
+        """Test that solid-colour images are dropped before OCR."""
+        image = Image.new('RGB', (100, 50), color='white')
+        image_buffer = io.BytesIO()
+        image.save(image_buffer, format='PNG')
+        
+        result = processor._decode_image('blank.png', image_buffer.getvalue())
+        
+        assert result is None
+    
     @pytest.mark.asyncio
-    async def test_process_image_from_zip_missing_image(self, processor):
-        """Test _process_image_from_zip with missing image file."""
+    async def test_extract_image_text_skips_blank_images(self, processor):
+        """Test that blank images never reach OCR."""
+        with tempfile.NamedTemporaryFile(suffix='.epub', delete=False) as temp_file:
+            with zipfile.ZipFile(temp_file.name, 'w') as zip_file:
+                for i, color in enumerate(['white', 'black', (120, 30, 200)]):
+                    image = Image.new('RGB', (100, 50), color=color)
+                    image_buffer = io.BytesIO()
+                    image.save(image_buffer, format='PNG')
+                    zip_file.writestr(f'separator_{i}.png', image_buffer.getvalue())
+            
+            try:
+                processor.ocr.ocr.reset_mock()
+                result = await processor._extract_image_text(temp_file.name)
+                
+                assert result == ""
+                processor.ocr.ocr.assert_not_called()
+            finally:
+                os.unlink(temp_file.name)
+    
+    @pytest.mark.asyncio
+    async def test_extract_image_text_streams_large_images(self, processor, sample_epub_with_images):
+        """Test that images above the streaming threshold are decoded from the archive stream."""
+        with patch('epub_processor.STREAM_IMAGE_SIZE', 0):
+            with patch.object(processor, '_read_image_from_zip') as mock_read:
+                result = await processor._extract_image_text(sample_epub_with_images)
+        
+        assert "Sample OCR text" in result
+        mock_read.assert_not_called()
+    
+    def test_decode_image_uses_turbojpeg_for_jpeg(self, processor):
+        """Test that JPEGs go through TurboJPEG when it is available."""
+        decoded = np.full((50, 100, 3), 255, dtype=np.uint8)
+        decoded[20:30, 10:90] = 0
+        mock_turbojpeg = Mock()
+        mock_turbojpeg.decode.return_value = decoded
+        
+        with patch('epub_processor._turbojpeg', mock_turbojpeg), patch('epub_processor.TJPF_RGB', 0, create=True):
+            result = processor._decode_image('photo.jpg', b'jpeg bytes')
+        
+        assert result is decoded
+        mock_turbojpeg.decode.assert_called_once_with(b'jpeg bytes', pixel_format=0)
+    
+    def test_decode_image_turbojpeg_falls_back_to_pil(self, processor):
+        """Test that JPEGs TurboJPEG cannot handle are decoded with PIL."""
+        image = Image.new('RGB', (100, 50), color='white')
+        ImageDraw.Draw(image).text((10, 20), "Sample", fill='black')
+        image_buffer = io.BytesIO()
+        image.save(image_buffer, format='PNG')
+        mock_turbojpeg = Mock()
+        mock_turbojpeg.decode.side_effect = OSError("Not a JPEG file")
+        
+        with patch('epub_processor._turbojpeg', mock_turbojpeg), patch('epub_processor.TJPF_RGB', 0, create=True):
+            result = processor._decode_image('mislabelled.jpg', image_buffer.getvalue())
+        
+        assert result.shape == (50, 100, 3)
+    
+    def test_read_image_from_zip_missing_image(self, processor):
+        """Test _read_image_from_zip with missing image file."""
         with tempfile.NamedTemporaryFile(suffix='.zip', delete=False) as temp_file:
             with zipfile.ZipFile(temp_file.name, 'w') as zip_file:
                 zip_file.writestr('dummy.txt', 'dummy content')
             
             try:
                 with zipfile.ZipFile(temp_file.name, 'r') as zip_file:
-                    result = await processor._process_image_from_zip(zip_file, 'missing_image.png')
+                    result = processor._read_image_from_zip(zip_file, 'missing_image.png')
                     
-                    assert result == ""
+                    assert result is None
             finally:
                 os.unlink(temp_file.name)
     
-    @pytest.mark.asyncio
-    async def test_process_image_from_zip_corrupted_image(self, processor):
-        """Test _process_image_from_zip with corrupted image data."""
+    def test_decode_image_corrupted_image(self, processor):
+        """Test _decode_image with corrupted image data."""
         with tempfile.NamedTemporaryFile(suffix='.zip', delete=False) as temp_file:
             with zipfile.ZipFile(temp_file.name, 'w') as zip_file:
                 zip_file.writestr('corrupted.png', b'not an image')
             
             try:
                 with zipfile.ZipFile(temp_file.name, 'r') as zip_file:
-                    result = await processor._process_image_from_zip(zip_file, 'corrupted.png')
+                    result = processor._decode_image('corrupted.png', zip_file.read('corrupted.png'))
                     
-                    assert result == ""
+                    assert result is None
             finally:
                 os.unlink(temp_file.name)
     
@@ -177,15 +314,246 @@ class TestEPUBProcessor:
     def test_run_ocr_ocr_exception(self, processor):
         """Test _run_ocr when OCR raises an exception."""
         image = Image.new('RGB', (100, 50), color='white')
-        processor.ocr.ocr.side_effect = Exception("OCR failed")
+        processor.ocr.ocr.side_effect = RuntimeError("OCR failed")
         
         result = processor._run_ocr(image)
         
-        assert result == ""
+        assert result is None
+    
+    def test_run_ocr_unexpected_error_propagates(self, processor):
+        """Test _run_ocr does not swallow errors that are not inference failures."""
+        image = Image.new('RGB', (100, 50), color='white')
+        processor.ocr.ocr.side_effect = TypeError("unexpected argument")
+        
+        with pytest.raises(TypeError):
+            processor._run_ocr(image)
+    
+    def test_run_ocr_tiles_large_images(self, processor):
+        """Test that large images are OCR'd in native-size tiles with overlap duplicates merged."""
+        from epub_processor import TILE_SIZE, _tile_origins
+        
+        origins = _tile_origins(2000)
+        calls = iter(origins)
+        
+        def fake_ocr(tile, cls=True):
+            # Each tile reads its own line; a line inside the first overlap
+            # is seen by both of the first two tiles at the same page position
+            left = next(calls)
+            lines = [[[[10, 10], [200, 10], [200, 40], [10, 40]], (f"tile {left}", 0.9)]]
+            if left in origins[:2]:
+                box = [[880 - left, 500], [950 - left, 500], [950 - left, 530], [880 - left, 530]]
+                lines.append([box, ("overlap", 0.8)])
+            return [lines]
+        
+        processor.ocr.ocr.side_effect = fake_ocr
+        
+        result = processor._run_ocr(np.zeros((TILE_SIZE, 2000, 3), dtype=np.uint8))
+        
+        assert processor.ocr.ocr.call_count == len(origins)
+        assert all(call.args[0].shape[:2] == (TILE_SIZE, TILE_SIZE)
+                   for call in processor.ocr.ocr.call_args_list)
+        assert result == " ".join([f"tile {left}" for left in origins] + ["overlap"])
+    
+    def test_run_ocr_tiles_keep_misaligned_line_in_order(self, processor):
+        """Test that one line read across tiles at slightly different heights stays left to right."""
+        from epub_processor import TILE_SIZE, _tile_origins
+        
+        origins = _tile_origins(2000)
+        calls = iter(enumerate(origins))
+        
+        def fake_ocr(tile, cls=True):
+            # Later tiles see the line a few pixels higher
+            i, left = next(calls)
+            top = 20 - 3 * i
+            return [[[[[10, top], [200, top], [200, top + 30], [10, top + 30]], (f"tile {left}", 0.9)]]]
+        
+        processor.ocr.ocr.side_effect = fake_ocr
+        
+        result = processor._run_ocr(np.zeros((TILE_SIZE, 2000, 3), dtype=np.uint8))
+        
+        assert result == " ".join(f"tile {left}" for left in origins)
+    
+    def test_run_ocr_batch_preserves_order(self, processor):
+        """Test that batched OCR returns one result per image in input order."""
+        images = [
+            np.zeros((64, 64, 3), dtype=np.uint8),
+            np.zeros((32, 128, 3), dtype=np.uint8),
+            np.zeros((64, 64, 3), dtype=np.uint8),
+        ]
+        processor.ocr.ocr.side_effect = lambda img, cls=True: [[
+            [[[0, 0], [1, 0], [1, 1], [0, 1]], (f"{img.shape[0]}x{img.shape[1]}", 0.9)]
+        ]]
+        
+        result = processor._run_ocr_batch(images)
+        
+        assert result == ["64x64", "32x128", "64x64"]
+    
+    @pytest.mark.asyncio
+    async def test_image_pipeline_batches_and_orders_results(self, processor):
+        """Test that the decode/OCR pipeline batches images and keeps input order."""
+        with tempfile.NamedTemporaryFile(suffix='.epub', delete=False) as temp_file:
+            with zipfile.ZipFile(temp_file.name, 'w') as zip_file:
+                for i in range(10):
+                    image = Image.new('RGB', (40 + i, 20), color='white')
+                    ImageDraw.Draw(image).text((2, 4), "Hi", fill='black')
+                    image_buffer = io.BytesIO()
+                    image.save(image_buffer, format='PNG')
+                    zip_file.writestr(f'image_{i}.png', image_buffer.getvalue())
+            
+            processor.ocr.ocr.side_effect = lambda img, cls=True: [[
+                [[[0, 0], [1, 0], [1, 1], [0, 1]], (f"width {img.shape[1]}", 0.9)]
+            ]]
+            
+            try:
+                with patch('epub_processor.OCR_BATCH_SIZE', 4):
+                    with patch.object(processor, '_run_ocr_batch', wraps=processor._run_ocr_batch) as mock_batch:
+                        result = await processor._extract_image_text(temp_file.name)
+                
+                assert result.split('\n\n') == [f"width {40 + i}" for i in range(10)]
+                assert all(len(call.args[0]) <= 4 for call in mock_batch.call_args_list)
+            finally:
+                os.unlink(temp_file.name)
+    
+    @pytest.mark.asyncio
+    async def test_image_pipeline_reads_images_off_event_loop(self, processor, sample_epub_with_images):
+        """Test that image entries are read and hashed on executor threads."""
+        reader_threads = set()
+        read_and_hash = processor._read_and_hash
+        
+        def record_thread(zip_file, image_file):
+            reader_threads.add(threading.get_ident())
+            return read_and_hash(zip_file, image_file)
+        
+        with patch.object(processor, '_read_and_hash', side_effect=record_thread):
+            result = await processor._extract_image_text(sample_epub_with_images)
+        
+        assert result
+        assert reader_threads
+        assert threading.get_ident() not in reader_threads
+    
+    @pytest.mark.asyncio
+    async def test_image_pipeline_overlaps_ocr_batches(self, processor):
+        """Test that several OCR batches for one EPUB run at the same time."""
+        with tempfile.NamedTemporaryFile(suffix='.epub', delete=False) as temp_file:
+            with zipfile.ZipFile(temp_file.name, 'w') as zip_file:
+                for i in range(32):
+                    image = Image.new('RGB', (40 + i, 20), color='white')
+                    ImageDraw.Draw(image).text((2, 4), "Hi", fill='black')
+                    image_buffer = io.BytesIO()
+                    image.save(image_buffer, format='PNG')
+                    zip_file.writestr(f'image_{i}.png', image_buffer.getvalue())
+            
+            lock = threading.Lock()
+            running = [0]
+            peak = [0]
+            
+            def slow_batch(images):
+                with lock:
+                    running[0] += 1
+                    peak[0] = max(peak[0], running[0])
+                time.sleep(0.05)
+                with lock:
+                    running[0] -= 1
+                return [f"width {image.shape[1]}" for image in images]
+            
+            try:
+                with patch('epub_processor.OCR_BATCH_SIZE', 4):
+                    with patch.object(processor, '_run_ocr_batch', side_effect=slow_batch):
+                        result = await processor._extract_image_text(temp_file.name)
+                
+                assert result.split('\n\n') == [f"width {40 + i}" for i in range(32)]
+                assert peak[0] > 1
+            finally:
+                os.unlink(temp_file.name)
+    
+    @pytest.mark.asyncio
+    async def test_image_pipeline_ocr_failure_does_not_hang(self, processor):
+        """Test that an OCR error fails the request even with the bounded queues full."""
+        from epub_processor import PIPELINE_QUEUE_SIZE
+        
+        with tempfile.NamedTemporaryFile(suffix='.epub', delete=False) as temp_file:
+            with zipfile.ZipFile(temp_file.name, 'w') as zip_file:
+                # Distinct images, enough to fill both queues behind the recognizer
+                for i in range(2 * PIPELINE_QUEUE_SIZE + 16):
+                    image = Image.new('RGB', (100, 50), color='white')
+                    ImageDraw.Draw(image).text((10, 20), f"Image {i}", fill='black')
+                    image_buffer = io.BytesIO()
+                    image.save(image_buffer, format='PNG')
+                    zip_file.writestr(f'image_{i}.png', image_buffer.getvalue())
+            
+            processor.ocr.ocr.side_effect = OSError("inference failed")
+            
+            try:
+                # Match the message: a timeout is an OSError too
+                with pytest.raises(OSError, match="inference failed"):
+                    await asyncio.wait_for(processor._extract_image_text(temp_file.name), timeout=10)
+            finally:
+                os.unlink(temp_file.name)
+    
+    @pytest.mark.asyncio
+    async def test_duplicate_images_ocr_once(self, processor):
+        """Test that identical images are OCR'd once and cached across EPUBs."""
+        with tempfile.NamedTemporaryFile(suffix='.epub', delete=False) as temp_file:
+            with zipfile.ZipFile(temp_file.name, 'w') as zip_file:
+                image = Image.new('RGB', (100, 50), color='white')
+                ImageDraw.Draw(image).text((10, 20), "Sample", fill='black')
+                image_buffer = io.BytesIO()
+                image.save(image_buffer, format='PNG')
+                for i in range(5):
+                    zip_file.writestr(f'ornament_{i}.png', image_buffer.getvalue())
+            
+            try:
+                processor.ocr.ocr.reset_mock()
+                result = await processor._extract_image_text(temp_file.name)
+                
+                # Every occurrence keeps its text, but OCR ran once
+                assert len(result.split('\n\n')) == 5
+                assert processor.ocr.ocr.call_count == 1
+                
+                # A later EPUB with the same image hits the cache
+                result = await processor._extract_image_text(temp_file.name)
+                assert len(result.split('\n\n')) == 5
+                assert processor.ocr.ocr.call_count == 1
+            finally:
+                os.unlink(temp_file.name)
+    
+    @pytest.mark.asyncio
+    async def test_failed_ocr_is_not_cached(self, processor):
+        """Test that an image whose OCR failed is retried rather than cached as blank."""
+        with tempfile.NamedTemporaryFile(suffix='.epub', delete=False) as temp_file:
+            with zipfile.ZipFile(temp_file.name, 'w') as zip_file:
+                image = Image.new('RGB', (100, 50), color='white')
+                ImageDraw.Draw(image).text((10, 20), "Sample", fill='black')
+                image_buffer = io.BytesIO()
+                image.save(image_buffer, format='PNG')
+                zip_file.writestr('image.png', image_buffer.getvalue())
+            
+            try:
+                processor.ocr.ocr.side_effect = MemoryError("transient")
+                failed_images = []
+                assert await processor._extract_image_text(temp_file.name, failed_images) == ""
+                assert failed_images == ['image.png']
+                assert not processor.ocr_cache
+                
+                processor.ocr.ocr.side_effect = None
+                result = await processor._extract_image_text(temp_file.name)
+                assert result == "Sample OCR text More OCR text"
+                assert list(processor.ocr_cache.values()) == [result]
+            finally:
+                os.unlink(temp_file.name)
+    
+    def test_ocr_cache_evicts_least_recently_used(self, processor):
+        """Test that the cross-request OCR cache stays bounded."""
+        with patch('epub_processor.OCR_CACHE_SIZE', 2):
+            processor._cache_ocr_text(b'a', "A")
+            processor._cache_ocr_text(b'b', "B")
+            processor._cache_ocr_text(b'c', "C")
+        
+        assert list(processor.ocr_cache) == [b'b', b'c']
     
     @pytest.mark.asyncio
     async def test_extract_text_epub_read_exception(self, processor):
-        """Test extract_text when epub.read_epub raises an exception."""
+        """Test extract_text when the EPUB archive cannot be read."""
         with tempfile.NamedTemporaryFile(suffix='.epub', delete=False) as temp_file:
             temp_file.write(b"invalid epub content")
             temp_file.flush()
@@ -214,6 +582,7 @@ class TestEPUBProcessor:
                 # Add multiple test images
                 for i in range(3):
                     image = Image.new('RGB', (100, 50), color='white')
+                    ImageDraw.Draw(image).text((10, 20), "Sample", fill='black')
                     image_buffer = io.BytesIO()
                     image.save(image_buffer, format='PNG')
                     zip_file.writestr(f'image_{i}.png', image_buffer.getvalue())
@@ -228,23 +597,23 @@ class TestEPUBProcessor:
             finally:
                 os.unlink(temp_file.name)
     
-    @pytest.mark.asyncio
-    async def test_image_format_conversion(self, processor):
+    def test_image_format_conversion(self, processor):
         """Test that images are properly converted to RGB format."""
         with tempfile.NamedTemporaryFile(suffix='.zip', delete=False) as temp_file:
             with zipfile.ZipFile(temp_file.name, 'w') as zip_file:
                 # Create a CMYK image (should be converted to RGB)
                 image = Image.new('CMYK', (100, 50), color=(100, 0, 100, 0))
+                ImageDraw.Draw(image).text((10, 20), "Sample", fill=(0, 0, 0, 255))
                 image_buffer = io.BytesIO()
                 image.save(image_buffer, format='JPEG')
                 zip_file.writestr('cmyk_image.jpg', image_buffer.getvalue())
             
             try:
                 with zipfile.ZipFile(temp_file.name, 'r') as zip_file:
-                    result = await processor._process_image_from_zip(zip_file, 'cmyk_image.jpg')
+                    result = processor._decode_image('cmyk_image.jpg', zip_file.read('cmyk_image.jpg'))
                     
-                    # Should successfully process and return OCR text
-                    assert "Sample OCR text" in result
+                    # Should be decoded as a 3-channel RGB array
+                    assert result.shape == (50, 100, 3)
             finally:
                 os.unlink(temp_file.name)
     
@@ -261,8 +630,170 @@ class TestEPUBProcessor:
                 
                 assert processor.ocr == mock_ocr
                 assert processor.executor == mock_executor
-                mock_ocr_class.assert_called_once_with(use_angle_cls=True, lang='en')
-                mock_executor_class.assert_called_once_with(max_workers=4)
+                mock_ocr_class.assert_called_once()
+                ocr_kwargs = mock_ocr_class.call_args.kwargs
+                assert ocr_kwargs['use_angle_cls'] is True
+                assert ocr_kwargs['lang'] == 'en'
+                assert ocr_kwargs['cpu_threads'] == os.cpu_count()
+                # Separate pools for OCR and image decoding
+                assert mock_executor_class.call_count == 2
+                mock_executor_class.assert_any_call(max_workers=4)
+                # Warmup is left to application startup
+                mock_ocr.ocr.assert_not_called()
+    
+    def test_processor_initialization_with_ocr_processes(self):
+        """Test that EPUB_OCR_PROCESSES gives each worker process its own PaddleOCR."""
+        from epub_processor import _init_ocr_worker
+        
+        with patch('epub_processor.PaddleOCR') as mock_ocr_class:
+            with patch('epub_processor.ProcessPoolExecutor') as mock_pool_class:
+                with patch('epub_processor.OCR_PROCESSES', 3):
+                    processor = EPUBProcessor()
+        
+        assert processor.ocr is None
+        assert processor.executor == mock_pool_class.return_value
+        mock_ocr_class.assert_not_called()
+        pool_kwargs = mock_pool_class.call_args.kwargs
+        assert pool_kwargs['max_workers'] == 3
+        assert pool_kwargs['initializer'] is _init_ocr_worker
+        assert pool_kwargs['initargs'][0]['lang'] == 'en'
+        # Warmup holds each worker until all three have started
+        assert pool_kwargs['initargs'][1].parties == 3
+    
+    def test_ocr_worker_warmup_waits_for_pool(self):
+        """Test that a pool worker reaches the start barrier even when its warmup fails."""
+        from epub_processor import _warmup_ocr_worker
+        
+        barrier = Mock()
+        with patch('epub_processor._worker_barrier', barrier):
+            with patch('epub_processor._warmup_ocr') as mock_warmup:
+                assert _warmup_ocr_worker(0) == os.getpid()
+                mock_warmup.side_effect = RuntimeError("warmup failed")
+                with pytest.raises(RuntimeError, match="warmup failed"):
+                    _warmup_ocr_worker(1)
+        
+        assert barrier.wait.call_count == 2
+    
+    def test_ocr_worker_batch_decodes_and_recognizes(self):
+        """Test that a pool worker decodes raw bytes and OCRs them with its own instance."""
+        from epub_processor import _ocr_worker_batch
+        
+        def encode(image):
+            buffer = io.BytesIO()
+            image.save(buffer, format='PNG')
+            return buffer.getvalue()
+        
+        text_image = Image.new('RGB', (100, 50), color='white')
+        ImageDraw.Draw(text_image).text((10, 20), "Worker", fill='black')
+        blank_image = Image.new('RGB', (100, 50), color='white')
+        
+        worker_ocr = Mock()
+        worker_ocr.ocr.return_value = [[[None, ("Worker", 0.9)]]]
+        with patch('epub_processor._worker_ocr', worker_ocr):
+            texts = _ocr_worker_batch([
+                ('text.png', encode(text_image)),
+                ('blank.png', encode(blank_image)),
+            ])
+        
+        assert texts == ["Worker", ""]
+        worker_ocr.ocr.assert_called_once()
+    
+    def test_warmup_covers_detection_and_recognition(self, processor):
+        """Test that warmup runs detection at each shape and recognition once."""
+        processor.ocr.ocr.reset_mock()
+        
+        processor.warmup()
+        
+        calls = processor.ocr.ocr.call_args_list
+        detection_shapes = [call.args[0].shape[:2] for call in calls if call.kwargs.get('det', True)]
+        recognition_calls = [call for call in calls if call.kwargs.get('det') is False]
+        assert detection_shapes == list(OCR_WARMUP_SHAPES)
+        assert len(recognition_calls) == 1
+    
+    @pytest.mark.parametrize("backend,expected", [
+        ("tensorrt", {"use_tensorrt": True}),
+        ("mkldnn", {"enable_mkldnn": True}),
+    ])
+    def test_model_dir_override(self, backend, expected):
+        """Test that PADDLEOCR_MODEL_DIR points PaddleOCR at persistent model dirs and keeps the backend options."""
+        from epub_processor import _ocr_options
+        
+        with patch.dict(os.environ, {"PADDLEOCR_BACKEND": backend, "PADDLEOCR_MODEL_DIR": "/models"}):
+            options = _ocr_options()
+        
+        assert options['det_model_dir'] == os.path.join('/models', 'det')
+        assert options['rec_model_dir'] == os.path.join('/models', 'rec')
+        assert options['cls_model_dir'] == os.path.join('/models', 'cls')
+        for key, value in expected.items():
+            assert options[key] == value
+    
+    @pytest.mark.parametrize("backend,expected", [
+        ("mkldnn", {"enable_mkldnn": True}),
+        ("tensorrt", {"use_gpu": True, "use_tensorrt": True, "precision": "fp16"}),
+        ("onnxruntime", {"use_onnx": True}),
+    ])
+    def test_ocr_backend_selection(self, backend, expected):
+        """Test that PADDLEOCR_BACKEND selects the matching PaddleOCR options."""
+        from epub_processor import _ocr_options
+        
+        with patch.dict(os.environ, {"PADDLEOCR_BACKEND": backend}):
+            options = _ocr_options()
+        
+        for key, value in expected.items():
+            assert options[key] == value
+    
+    def test_ocr_backend_invalid(self):
+        """Test that an unknown PADDLEOCR_BACKEND is rejected."""
+        from epub_processor import _ocr_options
+        
+        with patch.dict(os.environ, {"PADDLEOCR_BACKEND": "openvino"}):
+            with pytest.raises(ValueError):
+                _ocr_options()
+    
+    def test_ocr_tensorrt_on_cpu_rejected(self):
+        """Test that TensorRT is not silently moved to the GPU when the CPU was requested."""
+        from epub_processor import _ocr_options
+        
+        with patch.dict(os.environ, {"PADDLEOCR_BACKEND": "tensorrt", "EPUB_OCR_DEVICE": "cpu"}):
+            with pytest.raises(ValueError, match="needs a GPU"):
+                _ocr_options()
+    
+    @pytest.mark.parametrize("device,expected", [
+        ("cpu", {"use_gpu": False, "rec_batch_num": 1, "cls_batch_num": 1}),
+        ("gpu", {"use_gpu": True, "rec_batch_num": 32}),
+    ])
+    def test_ocr_device_selection(self, device, expected):
+        """Test that EPUB_OCR_DEVICE sizes the recognizer batch for the device."""
+        from epub_processor import _ocr_options
+        
+        with patch.dict(os.environ, {"PADDLEOCR_BACKEND": "paddle", "EPUB_OCR_DEVICE": device}):
+            options = _ocr_options()
+        
+        for key, value in expected.items():
+            assert options[key] == value
+    
+    @pytest.mark.parametrize("use_gpu", [True, False])
+    def test_gpu_enables_cudnn_autotuning(self, use_gpu):
+        """Test that cuDNN autotuning flags are set only for GPU inference."""
+        from epub_processor import GPU_CONV_FLAGS
+        
+        with patch('epub_processor._ocr_options', return_value={'use_gpu': use_gpu}):
+            with patch('epub_processor.paddle.set_flags') as mock_set_flags:
+                with patch('epub_processor.PaddleOCR'):
+                    EPUBProcessor()
+        
+        if use_gpu:
+            mock_set_flags.assert_called_once_with(GPU_CONV_FLAGS)
+        else:
+            mock_set_flags.assert_not_called()
+    
+    def test_ocr_device_invalid(self):
+        """Test that an unknown EPUB_OCR_DEVICE is rejected."""
+        from epub_processor import _ocr_options
+        
+        with patch.dict(os.environ, {"EPUB_OCR_DEVICE": "tpu"}):
+            with pytest.raises(ValueError):
+                _ocr_options()
     
     @pytest.mark.asyncio
     async def test_extract_text_combines_content_and_images(self, processor, sample_epub_with_images):
@@ -300,6 +831,7 @@ class TestEPUBProcessor:
                 
                 # Add image files
                 image = Image.new('RGB', (100, 50), color='white')
+                ImageDraw.Draw(image).text((10, 20), "Sample", fill='black')
                 image_buffer = io.BytesIO()
                 image.save(image_buffer, format='PNG')
                 zip_file.writestr('image1.png', image_buffer.getvalue())
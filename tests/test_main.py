@@ -1,20 +1,64 @@
 import pytest
+import pytest_asyncio
+import asyncio
 import tempfile
 import os
 from unittest.mock import patch, AsyncMock, Mock
+from fastapi import BackgroundTasks, HTTPException
 from fastapi.testclient import TestClient
+import httpx
+from starlette.requests import Request
 import io
 
-from main import app
+
+def _chunked_upload_request(filename: str, payload: bytes, piece_size: int = 256):
+    """Build a multipart upload request whose body arrives in pieces without a Content-Length."""
+    body = (b'--testboundary\r\n'
+            b'Content-Disposition: form-data; name="file"; filename="' + filename.encode() + b'"\r\n'
+            b'Content-Type: application/epub+zip\r\n\r\n'
+            + payload + b'\r\n--testboundary--\r\n')
+    messages = [{"type": "http.request", "body": body[i:i + piece_size], "more_body": True}
+                for i in range(0, len(body), piece_size)]
+    messages.append({"type": "http.request", "body": b"", "more_body": False})
+    
+    async def receive():
+        return messages.pop(0)
+    
+    request = Request({
+        "type": "http",
+        "method": "POST",
+        "headers": [(b"content-type", b"multipart/form-data; boundary=testboundary")]
+    }, receive)
+    return request, messages
 
 
 class TestMainAPI:
     
+    @pytest.fixture(autouse=True)
+    def mock_extract(self):
+        """Patch the processor for every test; tests override the result or side effect."""
+        with patch('main.epub_processor.extract_text') as mock_extract:
+            mock_extract.return_value = "Extracted text"
+            yield mock_extract
+    
     @pytest.fixture
-    def client(self):
-        """Create test client for FastAPI app."""
+    def upload_epub(self, app):
+        """The upload endpoint coroutine, for calling it directly with a built Request."""
+        # main is only imported through the app fixture, once PaddleOCR is patched
+        from main import upload_epub
+        return upload_epub
+    
+    @pytest.fixture(scope="module")
+    def client(self, app):
+        """Create test client for FastAPI app, shared by the module."""
         return TestClient(app)
     
+    @pytest_asyncio.fixture
+    async def async_client(self, app):
+        """Create an async client that serves the app on the test event loop."""
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            yield client
+    
     def test_health_check_endpoint(self, client):
         """Test GET / health check endpoint."""
         response = client.get("/")
@@ -22,41 +66,47 @@ class TestMainAPI:
         assert response.status_code == 200
         assert response.json() == {"message": "EPUB to Text API is running"}
     
-    def test_upload_epub_success_text_based(self, client, sample_epub_text):
+    def test_startup_warms_up_ocr(self, app):
+        """Test that application startup warms up the OCR model."""
+        with patch('main.epub_processor.warmup') as mock_warmup:
+            with TestClient(app) as startup_client:
+                response = startup_client.get("/")
+        
+        assert response.status_code == 200
+        mock_warmup.assert_called_once()
+    
+    def test_upload_epub_success_text_based(self, client, sample_epub_bytes, mock_extract):
         """Test successful upload and processing of text-based EPUB."""
-        with patch('main.epub_processor.extract_text') as mock_extract:
-            mock_extract.return_value = "Extracted text content from EPUB"
-            
-            with open(sample_epub_text, 'rb') as epub_file:
-                response = client.post(
-                    "/upload-epub",
-                    files={"file": ("test.epub", epub_file, "application/epub+zip")}
-                )
-            
-            assert response.status_code == 200
-            data = response.json()
-            assert data["filename"] == "test.epub"
-            assert data["text"] == "Extracted text content from EPUB"
-            assert data["status"] == "success"
-            mock_extract.assert_called_once()
+        mock_extract.return_value = "Extracted text content from EPUB"
+        
+        response = client.post(
+            "/upload-epub",
+            files={"file": ("test.epub", io.BytesIO(sample_epub_bytes), "application/epub+zip")}
+        )
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["filename"] == "test.epub"
+        assert data["text"] == "Extracted text content from EPUB"
+        assert data["status"] == "success"
+        mock_extract.assert_called_once()
     
-    def test_upload_epub_success_with_images(self, client, sample_epub_with_images):
+    def test_upload_epub_success_with_images(self, client, sample_epub_with_images, mock_extract):
         """Test successful upload and processing of EPUB with images."""
-        with patch('main.epub_processor.extract_text') as mock_extract:
-            mock_extract.return_value = "Text content\n\nOCR extracted text from images"
-            
-            with open(sample_epub_with_images, 'rb') as epub_file:
-                response = client.post(
-                    "/upload-epub",
-                    files={"file": ("book_with_images.epub", epub_file, "application/epub+zip")}
-                )
-            
-            assert response.status_code == 200
-            data = response.json()
-            assert data["filename"] == "book_with_images.epub"
-            assert "Text content" in data["text"]
-            assert "OCR extracted text" in data["text"]
-            assert data["status"] == "success"
+        mock_extract.return_value = "Text content\n\nOCR extracted text from images"
+        
+        with open(sample_epub_with_images, 'rb') as epub_file:
+            response = client.post(
+                "/upload-epub",
+                files={"file": ("book_with_images.epub", epub_file, "application/epub+zip")}
+            )
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["filename"] == "book_with_images.epub"
+        assert "Text content" in data["text"]
+        assert "OCR extracted text" in data["text"]
+        assert data["status"] == "success"
     
     def test_upload_non_epub_file(self, client, invalid_file):
         """Test upload of non-EPUB file returns 400 error."""
@@ -69,31 +119,27 @@ class TestMainAPI:
         assert response.status_code == 400
         assert "File must be an EPUB file" in response.json()["detail"]
     
-    def test_upload_file_with_wrong_extension(self, client, sample_epub_text):
+    def test_upload_file_with_wrong_extension(self, client, sample_epub_bytes):
         """Test upload of EPUB file with wrong extension."""
-        with open(sample_epub_text, 'rb') as epub_file:
-            response = client.post(
-                "/upload-epub",
-                files={"file": ("document.txt", epub_file, "application/epub+zip")}
-            )
+        response = client.post(
+            "/upload-epub",
+            files={"file": ("document.txt", io.BytesIO(sample_epub_bytes), "application/epub+zip")}
+        )
         
         assert response.status_code == 400
         assert "File must be an EPUB file" in response.json()["detail"]
     
-    def test_upload_file_case_insensitive_extension(self, client, sample_epub_text):
+    def test_upload_file_case_insensitive_extension(self, client, sample_epub_bytes):
         """Test that EPUB extension check is case insensitive."""
-        with patch('main.epub_processor.extract_text') as mock_extract:
-            mock_extract.return_value = "Extracted text"
-            
-            with open(sample_epub_text, 'rb') as epub_file:
-                response = client.post(
-                    "/upload-epub",
-                    files={"file": ("BOOK.EPUB", epub_file, "application/epub+zip")}
-                )
-            
-            assert response.status_code == 200
-            assert response.json()["filename"] == "BOOK.EPUB"
+        response = client.post(
+            "/upload-epub",
+            files={"file": ("BOOK.EPUB", io.BytesIO(sample_epub_bytes), "application/epub+zip")}
+        )
+        
+        assert response.status_code == 200
+        assert response.json()["filename"] == "BOOK.EPUB"
     
+    @pytest.mark.slow
     def test_upload_large_file(self, client, large_file):
         """Test upload of file larger than 50MB returns 413 error."""
         with open(large_file, 'rb') as big_file:
@@ -105,20 +151,136 @@ class TestMainAPI:
         assert response.status_code == 413
         assert "File too large (max 50MB)" in response.json()["detail"]
     
-    def test_upload_epub_processing_error(self, client, sample_epub_text):
-        """Test handling of processing errors during text extraction."""
-        with patch('main.epub_processor.extract_text') as mock_extract:
-            mock_extract.side_effect = Exception("Processing failed")
+    @pytest.mark.asyncio
+    async def test_upload_size_counted_without_declared_size(self, mock_extract, upload_epub):
+        """Test that the size limit holds for uploads that do not declare a size."""
+        request, messages = _chunked_upload_request("chunked.epub", b'PK\x03\x04' + b'0' * 2044)
+        
+        with patch('main.MAX_UPLOAD_SIZE', 1024), patch('main.UPLOAD_CHUNK_SIZE', 512):
+            with pytest.raises(HTTPException) as exc_info:
+                await upload_epub(request, BackgroundTasks())
+        
+        assert exc_info.value.status_code == 413
+        mock_extract.assert_not_called()
+        # The upload was rejected before the rest of the body was read
+        assert messages
+    
+    @pytest.mark.asyncio
+    async def test_non_epub_rejected_before_file_is_read(self, upload_epub):
+        """Test that a wrong extension is rejected from the part headers alone."""
+        request, messages = _chunked_upload_request("book.pdf", b'0' * 4096)
+        pieces = len(messages)
+        
+        with pytest.raises(HTTPException) as exc_info:
+            await upload_epub(request, BackgroundTasks())
+        
+        assert exc_info.value.status_code == 400
+        assert exc_info.value.detail == "File must be an EPUB file"
+        # Only the first piece of the body, which carries the part headers, was read
+        assert len(messages) == pieces - 1
+    
+    @pytest.mark.asyncio
+    async def test_upload_rejected_from_content_length(self, upload_epub):
+        """Test that an oversized declared body is rejected without reading it."""
+        async def receive():
+            raise AssertionError("request body should not be read")
+        
+        request = Request({
+            "type": "http",
+            "method": "POST",
+            "headers": [
+                (b"content-type", b"multipart/form-data; boundary=sizeboundary"),
+                (b"content-length", str(1024 ** 3).encode())
+            ]
+        }, receive)
+        
+        with pytest.raises(HTTPException) as exc_info:
+            await upload_epub(request, BackgroundTasks())
+        
+        assert exc_info.value.status_code == 413
+        assert "File too large (max 50MB)" in exc_info.value.detail
+    
+    def test_repeat_upload_served_from_result_cache(self, client, sample_epub_bytes, tmp_path, mock_extract):
+        """Test that uploading the same EPUB twice only processes it once."""
+        with patch('main.RESULT_CACHE_DIR', str(tmp_path)):
+            mock_extract.return_value = "Extracted text content from EPUB"
             
-            with open(sample_epub_text, 'rb') as epub_file:
+            responses = []
+            for _ in range(2):
+                responses.append(client.post(
+                    "/upload-epub",
+                    files={"file": ("test.epub", io.BytesIO(sample_epub_bytes), "application/epub+zip")}
+                ))
+        
+        assert [response.status_code for response in responses] == [200, 200]
+        assert responses[1].json()["text"] == "Extracted text content from EPUB"
+        mock_extract.assert_called_once()
+        assert len(list(tmp_path.glob('*.txt'))) == 1
+        assert not list(tmp_path.glob('*.tmp'))
+    
+    def test_partial_ocr_failure_is_not_cached(self, client, sample_epub_bytes, tmp_path, mock_extract):
+        """Test that a result with failed image OCR is returned but extracted again next time."""
+        async def extract_with_failure(epub_path, failed_images):
+            failed_images.append('image.png')
+            return "Partial text"
+        
+        mock_extract.side_effect = extract_with_failure
+        with patch('main.RESULT_CACHE_DIR', str(tmp_path)):
+            for _ in range(2):
+                response = client.post(
+                    "/upload-epub",
+                    files={"file": ("test.epub", io.BytesIO(sample_epub_bytes), "application/epub+zip")}
+                )
+                assert response.status_code == 200
+                assert response.json()["text"] == "Partial text"
+        
+        assert mock_extract.call_count == 2
+        assert not list(tmp_path.iterdir())
+    
+    def test_failed_cache_write_removes_temp_file(self, client, sample_epub_bytes, tmp_path, mock_extract):
+        """Test that a cache write failing at fsync leaves no temp file behind."""
+        with patch('main.RESULT_CACHE_DIR', str(tmp_path)):
+            with patch('main.os.fsync', side_effect=OSError("No space left on device")):
                 response = client.post(
                     "/upload-epub",
-                    files={"file": ("test.epub", epub_file, "application/epub+zip")}
+                    files={"file": ("test.epub", io.BytesIO(sample_epub_bytes), "application/epub+zip")}
                 )
+        
+        assert response.status_code == 200
+        assert response.json()["text"] == "Extracted text"
+        assert not list(tmp_path.iterdir())
+    
+    def test_corrupt_result_cache_entry_falls_back_to_extraction(self, client, sample_epub_bytes, tmp_path, mock_extract):
+        """Test that an unreadable cache entry is treated as a miss rather than a server error."""
+        with patch('main.RESULT_CACHE_DIR', str(tmp_path)):
+            client.post(
+                "/upload-epub",
+                files={"file": ("test.epub", io.BytesIO(sample_epub_bytes), "application/epub+zip")}
+            )
+            for cache_file in tmp_path.glob('*.txt'):
+                cache_file.write_bytes(b'\xff\xfe\xfa')
             
-            assert response.status_code == 500
-            assert "Error processing EPUB" in response.json()["detail"]
-            assert "Processing failed" in response.json()["detail"]
+            response = client.post(
+                "/upload-epub",
+                files={"file": ("test.epub", io.BytesIO(sample_epub_bytes), "application/epub+zip")}
+            )
+        
+        assert response.status_code == 200
+        assert response.json()["text"] == "Extracted text"
+        assert mock_extract.call_count == 2
+    
+    def test_upload_epub_processing_error(self, client, sample_epub_bytes, mock_extract):
+        """Test handling of processing errors during text extraction."""
+        mock_extract.side_effect = Exception("Processing failed")
+        
+        response = client.post(
+            "/upload-epub",
+            files={"file": ("test.epub", io.BytesIO(sample_epub_bytes), "application/epub+zip")}
+        )
+        
+        assert response.status_code == 500
+        assert "Error processing EPUB" in response.json()["detail"]
+        assert "Processing failed" in response.json()["detail"]
     
     def test_upload_no_file(self, client):
         """Test upload endpoint without file parameter."""
@@ -126,7 +288,7 @@ class TestMainAPI:
         
         assert response.status_code == 422  # Unprocessable Entity
     
-    def test_upload_empty_file(self, client):
+    def test_upload_empty_file(self, client, mock_extract):
         """Test upload of empty file."""
         empty_file = io.BytesIO(b"")
         response = client.post(
@@ -134,154 +296,194 @@ class TestMainAPI:
             files={"file": ("empty.epub", empty_file, "application/epub+zip")}
         )
         
-        # Should still process but might fail in processing
-        assert response.status_code in [400, 500]
+        # Rejected without ever reaching the processor
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Empty file"
+        mock_extract.assert_not_called()
     
-    def test_file_cleanup_on_success(self, client, sample_epub_text):
+    def test_upload_epub_bad_magic(self, client, mock_extract):
+        """Test that a body that is not a ZIP archive is rejected before processing."""
+        response = client.post(
+            "/upload-epub",
+            files={"file": ("fake.epub", io.BytesIO(b"not a zip"), "application/epub+zip")}
+        )
+        
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Not a valid EPUB (bad magic)"
+        mock_extract.assert_not_called()
+    
+    def test_file_cleanup_on_success(self, client, sample_epub_bytes, tmp_path):
         """Test that temporary files are cleaned up after successful processing."""
-        with patch('main.epub_processor.extract_text') as mock_extract:
-            mock_extract.return_value = "Extracted text"
-            
-            with patch('os.unlink') as mock_unlink:
-                with open(sample_epub_text, 'rb') as epub_file:
-                    response = client.post(
-                        "/upload-epub",
-                        files={"file": ("test.epub", epub_file, "application/epub+zip")}
-                    )
-                
-                assert response.status_code == 200
-                mock_unlink.assert_called_once()
+        # The real unlink still runs, so nothing is left in the upload dir
+        with patch('main.UPLOAD_TEMP_DIR', str(tmp_path)):
+            with patch('main.os.unlink', wraps=os.unlink) as mock_unlink:
+                response = client.post(
+                    "/upload-epub",
+                    files={"file": ("test.epub", io.BytesIO(sample_epub_bytes), "application/epub+zip")}
+                )
+        
+        assert response.status_code == 200
+        mock_unlink.assert_called_once()
+        assert not list(tmp_path.iterdir())
     
-    def test_file_cleanup_on_error(self, client, sample_epub_text):
+    @pytest.mark.asyncio
+    async def test_file_cleanup_deferred_to_background_task(self, sample_epub_bytes, upload_epub):
+        """Test that a successful upload's temp file is removed after the response is built."""
+        request, _ = _chunked_upload_request("book.epub", sample_epub_bytes)
+        background_tasks = BackgroundTasks()
+        
+        await upload_epub(request, background_tasks)
+        
+        (cleanup,) = background_tasks.tasks
+        temp_path = cleanup.args[0]
+        assert os.path.exists(temp_path)
+        
+        await background_tasks()
+        assert not os.path.exists(temp_path)
+    
+    def test_file_cleanup_on_error(self, client, sample_epub_bytes, mock_extract, tmp_path):
         """Test that temporary files are cleaned up even when processing fails."""
-        with patch('main.epub_processor.extract_text') as mock_extract:
-            mock_extract.side_effect = Exception("Processing failed")
-            
-            with patch('os.unlink') as mock_unlink:
-                with open(sample_epub_text, 'rb') as epub_file:
-                    response = client.post(
-                        "/upload-epub",
-                        files={"file": ("test.epub", epub_file, "application/epub+zip")}
-                    )
-                
-                assert response.status_code == 500
-                mock_unlink.assert_called_once()
-    
-    def test_upload_multiple_requests_concurrent(self, client, sample_epub_text):
+        mock_extract.side_effect = Exception("Processing failed")
+        
+        with patch('main.UPLOAD_TEMP_DIR', str(tmp_path)):
+            with patch('main.os.unlink', wraps=os.unlink) as mock_unlink:
+                response = client.post(
+                    "/upload-epub",
+                    files={"file": ("test.epub", io.BytesIO(sample_epub_bytes), "application/epub+zip")}
+                )
+        
+        assert response.status_code == 500
+        mock_unlink.assert_called_once()
+        assert not list(tmp_path.iterdir())
+    
+    @pytest.mark.asyncio
+    async def test_upload_multiple_requests_concurrent(self, async_client, sample_epub_bytes, mock_extract):
         """Test handling of multiple concurrent upload requests."""
-        with patch('main.epub_processor.extract_text') as mock_extract:
-            mock_extract.return_value = "Extracted text"
-            
-            import concurrent.futures
-            import threading
-            
-            def upload_file():
-                with open(sample_epub_text, 'rb') as epub_file:
-                    return client.post(
-                        "/upload-epub",
-                        files={"file": ("test.epub", epub_file, "application/epub+zip")}
-                    )
-            
-            # Send 3 concurrent requests
-            with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
-                futures = [executor.submit(upload_file) for _ in range(3)]
-                responses = [future.result() for future in futures]
-            
-            # All requests should succeed
-            for response in responses:
-                assert response.status_code == 200
-                assert response.json()["status"] == "success"
-            
-            # extract_text should be called 3 times
-            assert mock_extract.call_count == 3
+        # Send 3 concurrent requests on the event loop
+        responses = await asyncio.gather(*[
+            async_client.post(
+                "/upload-epub",
+                files={"file": ("test.epub", io.BytesIO(sample_epub_bytes), "application/epub+zip")}
+            )
+            for _ in range(3)
+        ])
+        
+        # All requests should succeed
+        for response in responses:
+            assert response.status_code == 200
+            assert response.json()["status"] == "success"
+        
+        # extract_text should be called 3 times
+        assert mock_extract.call_count == 3
+    
+    @pytest.mark.parametrize("free_bytes,on_shm", [
+        (64 * 1024 * 1024, False),
+        (1024 * 1024 * 1024, True),
+    ])
+    def test_upload_dir_uses_shm_only_with_room(self, app, free_bytes, on_shm):
+        """Test that uploads fall back to the temp directory when /dev/shm is too small."""
+        from main import _default_upload_dir
+        
+        shm = Mock(f_bavail=free_bytes // 4096, f_frsize=4096)
+        with patch('main.os.statvfs', return_value=shm):
+            assert (_default_upload_dir() == '/dev/shm') == on_shm
     
-    def test_upload_various_mime_types(self, client, sample_epub_text):
+    @pytest.mark.parametrize("mime_type", [
+        "application/epub+zip",
+        "application/epub",
+        "application/octet-stream"
+    ])
+    def test_upload_various_mime_types(self, client, sample_epub_bytes, mime_type):
         """Test upload with various MIME types for EPUB files."""
-        with patch('main.epub_processor.extract_text') as mock_extract:
-            mock_extract.return_value = "Extracted text"
-            
-            mime_types = [
-                "application/epub+zip",
-                "application/epub",
-                "application/octet-stream"
-            ]
-            
-            for mime_type in mime_types:
-                with open(sample_epub_text, 'rb') as epub_file:
-                    response = client.post(
-                        "/upload-epub",
-                        files={"file": ("test.epub", epub_file, mime_type)}
-                    )
-                
-                assert response.status_code == 200
-                assert response.json()["status"] == "success"
+        response = client.post(
+            "/upload-epub",
+            files={"file": ("test.epub", io.BytesIO(sample_epub_bytes), mime_type)}
+        )
+        
+        assert response.status_code == 200
+        assert response.json()["status"] == "success"
     
-    def test_response_content_type(self, client, sample_epub_text):
+    def test_response_content_type(self, client, sample_epub_bytes):
         """Test that response has correct content type."""
-        with patch('main.epub_processor.extract_text') as mock_extract:
-            mock_extract.return_value = "Extracted text"
-            
-            with open(sample_epub_text, 'rb') as epub_file:
-                response = client.post(
-                    "/upload-epub",
-                    files={"file": ("test.epub", epub_file, "application/epub+zip")}
-                )
-            
-            assert response.status_code == 200
-            assert response.headers["content-type"] == "application/json"
+        response = client.post(
+            "/upload-epub",
+            files={"file": ("test.epub", io.BytesIO(sample_epub_bytes), "application/epub+zip")}
+        )
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
     
-    def test_file_size_edge_cases(self, client):
-        """Test file size validation with edge cases."""
-        # Test exactly 50MB (should pass)
-        with patch('main.epub_processor.extract_text') as mock_extract:
-            mock_extract.return_value = "Extracted text"
-            
-            # Create exactly 50MB file
-            file_content = b'0' * (50 * 1024 * 1024)
-            file_obj = io.BytesIO(file_content)
+    def test_upload_epub_stream_ndjson(self, client, sample_epub_bytes, mock_extract):
+        """Test that the streaming endpoint returns the text as NDJSON slices."""
+        import json
+        
+        extracted_text = "Chapter text. " * 10
+        with patch('main.STREAM_TEXT_CHUNK_SIZE', 32):
+            mock_extract.return_value = extracted_text
             
             response = client.post(
-                "/upload-epub",
-                files={"file": ("exact_50mb.epub", file_obj, "application/epub+zip")}
+                "/upload-epub/stream",
+                files={"file": ("test.epub", io.BytesIO(sample_epub_bytes), "application/epub+zip")}
             )
-            
-            assert response.status_code == 200
         
-        # Test 50MB + 1 byte (should fail)
-        file_content = b'0' * (50 * 1024 * 1024 + 1)
-        file_obj = io.BytesIO(file_content)
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert lines[0] == {"filename": "test.epub", "status": "success"}
+        assert len(lines) > 2
+        assert all(len(line["text"]) <= 32 for line in lines[1:])
+        assert "".join(line["text"] for line in lines[1:]) == extracted_text
+    
+    @pytest.fixture
+    def sparse_payload(self):
+        """Empty sparse temp file that size tests grow with truncate(), so no payload is held in memory."""
+        with tempfile.TemporaryFile() as payload:
+            yield payload
+    
+    @pytest.mark.slow
+    def test_file_size_edge_cases(self, client, sparse_payload):
+        """Test file size validation with edge cases."""
+        from main import MAX_UPLOAD_SIZE, UPLOAD_FRAMING_ALLOWANCE
+        
+        # Test exactly 50MB (should pass)
+        sparse_payload.write(b'PK\x03\x04')
+        sparse_payload.truncate(50 * 1024 * 1024)
         
         response = client.post(
             "/upload-epub",
-            files={"file": ("over_50mb.epub", file_obj, "application/epub+zip")}
+            files={"file": ("exact_50mb.epub", sparse_payload, "application/epub+zip")}
+        )
+        
+        assert response.status_code == 200
+        
+        # Over the limit: a declared size past the framing allowance is refused
+        # before the body is read, so no payload needs to be sent
+        response = client.post(
+            "/upload-epub",
+            headers={"content-length": str(MAX_UPLOAD_SIZE + UPLOAD_FRAMING_ALLOWANCE + 1)}
         )
         
         assert response.status_code == 413
     
-    def test_special_characters_in_filename(self, client, sample_epub_text):
+    @pytest.mark.parametrize("filename", [
+        "test file with spaces.epub",
+        "test-file-with-dashes.epub",
+        "test_file_with_underscores.epub",
+        "テスト.epub",  # Japanese characters
+        "test@file#2.epub"
+    ])
+    def test_special_characters_in_filename(self, client, sample_epub_bytes, filename):
         """Test upload with special characters in filename."""
-        with patch('main.epub_processor.extract_text') as mock_extract:
-            mock_extract.return_value = "Extracted text"
-            
-            special_filenames = [
-                "test file with spaces.epub",
-                "test-file-with-dashes.epub",
-                "test_file_with_underscores.epub",
-                "テスト.epub",  # Japanese characters
-                "test@file#2.epub"
-            ]
-            
-            for filename in special_filenames:
-                with open(sample_epub_text, 'rb') as epub_file:
-                    response = client.post(
-                        "/upload-epub",
-                        files={"file": (filename, epub_file, "application/epub+zip")}
-                    )
-                
-                assert response.status_code == 200
-                assert response.json()["filename"] == filename
+        response = client.post(
+            "/upload-epub",
+            files={"file": (filename, io.BytesIO(sample_epub_bytes), "application/epub+zip")}
+        )
+        
+        assert response.status_code == 200
+        assert response.json()["filename"] == filename
     
-    def test_api_documentation_endpoints(self, client):
+    def test_api_documentation_endpoints(self, client, app):
         """Test that API documentation endpoints are available."""
         # Test OpenAPI JSON
         response = client.get("/openapi.json")
@@ -294,18 +496,17 @@ class TestMainAPI:
         # Check that our endpoints are documented
         assert "/upload-epub" in openapi_spec["paths"]
         assert "/" in openapi_spec["paths"]
+        
+        # The schema was generated at import and is served as is
+        assert openapi_spec == app.openapi_schema
     
-    def test_cors_and_headers(self, client, sample_epub_text):
+    def test_cors_and_headers(self, client, sample_epub_bytes):
         """Test CORS and security headers."""
-        with patch('main.epub_processor.extract_text') as mock_extract:
-            mock_extract.return_value = "Extracted text"
-            
-            with open(sample_epub_text, 'rb') as epub_file:
-                response = client.post(
-                    "/upload-epub",
-                    files={"file": ("test.epub", epub_file, "application/epub+zip")}
-                )
-            
-            assert response.status_code == 200
-            # FastAPI automatically includes some security headers
-            assert "content-length" in response.headers
\ No newline at end of file
+        response = client.post(
+            "/upload-epub",
+            files={"file": ("test.epub", io.BytesIO(sample_epub_bytes), "application/epub+zip")}
+        )
+        
+        assert response.status_code == 200
+        # FastAPI automatically includes some security headers
+        assert "content-length" in response.headers
\ No newline at end of file